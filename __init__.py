@@ -1,5 +1,6 @@
 from .strategy_tester import StrategyTester
 from .strategy import Strategy
 from .backtest import Backtest
+from .batch_backtest import BatchBacktest
 from .indicator import Indicator
 from .user import User
\ No newline at end of file
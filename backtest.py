@@ -1,3 +1,4 @@
+from functools import cached_property
 from unittest import result
 import pandas as pd
 import numpy as np
@@ -24,7 +25,30 @@ class Backtest:
             draw_down (float): Draw down of trade
             bars_traded (int): Number of bars traded
 
+    Each metric is a cached property: it is computed at most once per instance,
+    only when it (or a metric that depends on it) is requested.
     """
+    # Metrics of result in order
+    metrics = (
+        'initial_capital', 'net_profit', 'net_profit_percent', 'gross_profit',
+        'gross_profit_percent', 'gross_loss', 'gross_loss_percent', 'max_draw_down',
+        'buy_and_hold_return', 'buy_and_hold_return_percent', 'profit_factor',
+        'max_contract_held', 'total_closed_trades', 'total_open_trades',
+        'number_wining_trades', 'number_losing_trades', 'percent_profitable',
+        'avg_trade', 'avg_trade_percent', 'avg_wining_trade', 'avg_wining_trade_percent',
+        'avg_losing_trade', 'avg_losing_trade_percent', 'largest_wining_trade',
+        'largest_wining_trade_percent', 'largest_lossing_trade',
+        'largest_lossing_trade_percent', 'ratio_avg_win_divide_avg_lose',
+        'avg_bars_in_trade', 'avg_bars_in_wining_trade', 'avg_bars_in_losing_trade',
+    )
+    # Named subsets of metrics for result(profile=...)
+    profiles = {
+        'full': metrics,
+        'rank': ('net_profit_percent', 'profit_factor', 'max_draw_down'),
+        'summary': ('net_profit', 'net_profit_percent', 'profit_factor', 'max_draw_down',
+                    'total_closed_trades', 'percent_profitable', 'avg_trade'),
+    }
+
     def __init__(self, trades:pd.DataFrame, candles:pd.DataFrame, initial_capital:float):
         self.trades = self._validate_trades(trades)
         self.initial_capital = initial_capital
@@ -46,17 +70,17 @@ class Backtest:
         profit = trades.profit * trades.contract
         return profit.sum(axis=0)
     
-    @property
+    @cached_property
     def net_profit(self) -> float:
         """ Calculate net profit of strategy
 
         Returns:
             float: Net profit of strategy
         """
-        net_profit = self.profit(self.trades)
+        net_profit = np.nansum(self._arrays()["net"])
         return net_profit
     
-    @property
+    @cached_property
     def net_profit_percent(self) -> float:
         """ Calculate net profit percentage of strategy
 
@@ -66,17 +90,18 @@ class Backtest:
         net_profit_percent = self.percentage_compared_to_initial_capital(self.net_profit)
         return net_profit_percent
     
-    @property
+    @cached_property
     def gross_profit(self) -> float:
         """ Calculate gross profit of strategy
 
         Returns:
             float: Gross profit of strategy
         """
-        gross_profit = self.profit(self.trades[self.trades.profit > 0])
+        arrays = self._arrays()
+        gross_profit = arrays["net"][arrays["win"]].sum()
         return gross_profit
     
-    @property
+    @cached_property
     def gross_profit_percent(self) -> float:
         """ Calculate gross profit percentage of strategy
 
@@ -86,17 +111,18 @@ class Backtest:
         gross_profit_percent = self.percentage_compared_to_initial_capital(self.gross_profit)
         return gross_profit_percent
     
-    @property
+    @cached_property
     def gross_loss(self) -> float:
         """ Calculate gross loss of strategy
 
         Returns:
             float: Gross loss of strategy
         """
-        gross_loss = self.profit(self.trades[self.trades.profit <= 0])
+        arrays = self._arrays()
+        gross_loss = arrays["net"][arrays["lose"]].sum()
         return gross_loss
     
-    @property
+    @cached_property
     def gross_loss_percent(self) -> float:
         """ Calculate gross loss percentage of strategy
 
@@ -106,27 +132,27 @@ class Backtest:
         gross_loss_percent = self.percentage_compared_to_initial_capital(self.gross_loss)
         return gross_loss_percent
     
-    @property
+    @cached_property
     def max_draw_down(self) -> float:
         """ Calculate maximum draw down of strategy
 
         Returns:
             float: Maximum draw down of strategy
         """
-        draw_down = self.trades.draw_down.min()
+        draw_down = self._nanreduce(np.min, self._arrays()["draw_down"])
         return draw_down
     
-    @property
+    @cached_property
     def min_draw_down(self) -> float:
         """ Calculate minimum draw down of strategy
 
         Returns:
             float: Minimum draw down of strategy
         """
-        draw_down = self.trades.draw_down.min()
+        draw_down = self._nanreduce(np.min, self._arrays()["draw_down"])
         return draw_down
     
-    @property
+    @cached_property
     def buy_and_hold_return(self) -> float:
         """ Calculate buy and hold return of strategy
 
@@ -136,7 +162,7 @@ class Backtest:
         buy_and_hold_return = self.end_candle.close - self.start_candle.open
         return buy_and_hold_return
     
-    @property
+    @cached_property
     def buy_and_hold_return_percent(self) -> float:
         """ Calculate buy and hold return percentage of strategy
 
@@ -146,7 +172,7 @@ class Backtest:
         buy_and_hold_return_percent = self.buy_and_hold_return*100/self.start_candle.open
         return buy_and_hold_return_percent
 
-    @property
+    @cached_property
     def profit_factor(self) -> float:
         """ Calculate profit factor of strategy
 
@@ -156,57 +182,57 @@ class Backtest:
         profit_factor = self.gross_profit / abs(self.gross_loss) if self.gross_loss != 0 else self.gross_profit
         return profit_factor
     
-    @property
+    @cached_property
     def max_contract_held(self) -> float:
         """ Calculate maximum contract held of strategy
 
         Returns:
             float: Maximum contract held of strategy
         """
-        max_contract_held = self.trades.contract.max()
+        max_contract_held = self._nanreduce(np.max, self._arrays()["contract"])
         return max_contract_held
     
-    @property
+    @cached_property
     def total_closed_trades(self) -> int:
         """ Calculate total closed trades of strategy
 
         Returns:
             int: Total closed trades of strategy
         """
-        total_closed_trades = self.trades[~pd.isna(self.trades.exit_date)].shape[0]
+        total_closed_trades = int(self._arrays()["exit"].sum())
         return total_closed_trades
     
-    @property
+    @cached_property
     def total_open_trades(self) -> int:
         """ Calculate total open trades of strategy
 
         Returns:
             int: Total open trades of strategy
         """
-        total_open_trades = self.trades.exit_date.isna().sum()
+        total_open_trades = np.int64((~self._arrays()["exit"]).sum())
         return total_open_trades
     
-    @property
+    @cached_property
     def number_wining_trades(self) -> int:
         """ Calculate number of winning trades of strategy
 
         Returns:
             int: Number of winning trades of strategy
         """
-        number_wining_trades = self.trades[self.trades.profit > 0].shape[0]
+        number_wining_trades = int(self._arrays()["win"].sum())
         return number_wining_trades
     
-    @property
+    @cached_property
     def number_losing_trades(self) -> int:
         """ Calculate number of losing trades of strategy
 
         Returns:
             int: Number of losing trades of strategy
         """
-        number_losing_trades = self.trades[self.trades.profit <= 0].shape[0]
+        number_losing_trades = int(self._arrays()["lose"].sum())
         return number_losing_trades
     
-    @property
+    @cached_property
     def percent_profitable(self) -> float:
         """ Calculate percent profitable of strategy
 
@@ -216,69 +242,71 @@ class Backtest:
         percent_profitable = self.number_wining_trades * 100 / abs(self.total_closed_trades) if self.total_closed_trades != 0 else 0
         return percent_profitable
     
-    @property
+    @cached_property
     def avg_trade(self) -> float:
         """ Calculate average trade of strategy
 
         Returns:
             float: Average trade of strategy
         """
-        avg_trade = (self.trades.profit * self.trades.contract).mean()
+        avg_trade = self._nanmean(self._arrays()["net"])
         return avg_trade
     
-    @property
+    @cached_property
     def avg_trade_percent(self) -> float:
         """ Calculate average trade percentage of strategy
 
         Returns:
             float: Average trade percentage of strategy
         """
-        avg_trade_percent = self.trades.profit_percent.mean()
+        avg_trade_percent = self._nanmean(self._arrays()["profit_percent"])
         return avg_trade_percent
     
-    @property
+    @cached_property
     def avg_wining_trade(self) -> float:
         """ Calculate average winning trade of strategy
 
         Returns:
             float: Average winning trade of strategy
         """
-        win_profit = self.trades[self.trades.profit > 0]
-        avg_wining_trade = (win_profit.profit * win_profit.contract).mean()
+        arrays = self._arrays()
+        avg_wining_trade = self._nanmean(arrays["net"][arrays["win"]])
         return avg_wining_trade
     
-    @property
+    @cached_property
     def avg_wining_trade_percent(self) -> float:
         """ Calculate average winning trade percentage of strategy
 
         Returns:
             float: Average winning trade percentage of strategy
         """
-        avg_wining_trade_percent = self.trades[self.trades.profit_percent > 0].profit_percent.mean()
+        arrays = self._arrays()
+        avg_wining_trade_percent = self._nanmean(arrays["profit_percent"][arrays["win_percent"]])
         return avg_wining_trade_percent
     
-    @property
+    @cached_property
     def avg_losing_trade(self) -> float:
         """ Calculate average losing trade of strategy
 
         Returns:
             float: Average losing trade of strategy
         """
-        lose_profit = self.trades[self.trades.profit <= 0]
-        avg_losing_trade = (lose_profit.profit * lose_profit.contract).mean()
+        arrays = self._arrays()
+        avg_losing_trade = self._nanmean(arrays["net"][arrays["lose"]])
         return avg_losing_trade
     
-    @property
+    @cached_property
     def avg_losing_trade_percent(self) -> float:
         """ Calculate average losing trade percentage of strategy
 
         Returns:
             float: Average losing trade percentage of strategy
         """
-        avg_losing_trade_percent = self.trades[self.trades.profit_percent <= 0].profit_percent.mean()
+        arrays = self._arrays()
+        avg_losing_trade_percent = self._nanmean(arrays["profit_percent"][arrays["lose_percent"]])
         return avg_losing_trade_percent
     
-    @property
+    @cached_property
     def ratio_avg_win_divide_avg_lose(self) -> float:
         """ Calculate ratio average winning trade divide average losing trade of strategy
 
@@ -288,7 +316,7 @@ class Backtest:
         ratio_avg_win_divide_avg_lose = self.avg_wining_trade / abs(self.avg_losing_trade) if self.avg_losing_trade != 0 else 0
         return ratio_avg_win_divide_avg_lose
     
-    @property
+    @cached_property
     def largest_wining_trade(self) -> float:
         """ Calculate largest winning trade of strategy
 
@@ -296,9 +324,9 @@ class Backtest:
             float: Largest winning trade of strategy
         """
         largest_wining_trade = self._largest_wining_trade()
-        return largest_wining_trade.profit * largest_wining_trade.contract
+        return self._arrays()["net"][largest_wining_trade] if largest_wining_trade is not None else np.nan
     
-    @property
+    @cached_property
     def largest_wining_trade_percent(self) -> float:
         """ Calculate largest winning trade percent of strategy
 
@@ -306,9 +334,9 @@ class Backtest:
             float: Largest winning trade percent of strategy
         """
         largest_wining_trade = self._largest_wining_trade()
-        return largest_wining_trade.profit_percent
+        return self._arrays()["profit_percent"][largest_wining_trade] if largest_wining_trade is not None else np.nan
     
-    @property
+    @cached_property
     def largest_lossing_trade(self) -> float:
         """ Calculate largest losing trade of strategy
 
@@ -316,9 +344,9 @@ class Backtest:
             float: Largest losing trade of strategy
         """
         largest_lossing_trade = self._largest_lossing_trade()
-        return largest_lossing_trade.profit * largest_lossing_trade.contract
+        return self._arrays()["net"][largest_lossing_trade] if largest_lossing_trade is not None else np.nan
     
-    @property
+    @cached_property
     def largest_lossing_trade_percent(self) -> float:
         """ Calculate largest losing trade percent of strategy
 
@@ -326,36 +354,38 @@ class Backtest:
             float: Largest losing trade percent of strategy
         """
         largest_lossing_trade = self._largest_lossing_trade()
-        return largest_lossing_trade.profit_percent
+        return self._arrays()["profit_percent"][largest_lossing_trade] if largest_lossing_trade is not None else np.nan
     
-    @property
+    @cached_property
     def avg_bars_in_trade(self) -> float:
         """ Calculate average bars in trade of strategy
 
         Returns:
             float: Average bars in trade of strategy
         """
-        avg_bars_in_trade = self.trades.bars_traded.mean()
+        avg_bars_in_trade = self._nanmean(self._arrays()["bars_traded"])
         return avg_bars_in_trade
     
-    @property
+    @cached_property
     def avg_bars_in_wining_trade(self) -> float:
         """ Calculate average bars in winning trade of strategy
 
         Returns:
             float: Average bars in winning trade of strategy
         """
-        avg_bars_in_wining_trade = self.trades[self.trades.profit > 0].bars_traded.mean()
+        arrays = self._arrays()
+        avg_bars_in_wining_trade = self._nanmean(arrays["bars_traded"][arrays["win"]])
         return avg_bars_in_wining_trade
     
-    @property
+    @cached_property
     def avg_bars_in_losing_trade(self) -> float:
         """ Calculate average bars in losing trade of strategy
 
         Returns:
             float: Average bars in losing trade of strategy
         """
-        avg_bars_in_losing_trade = self.trades[self.trades.profit <= 0].bars_traded.mean()
+        arrays = self._arrays()
+        avg_bars_in_losing_trade = self._nanmean(arrays["bars_traded"][arrays["lose"]])
         return avg_bars_in_losing_trade
     
     @staticmethod
@@ -413,22 +443,22 @@ class Backtest:
         initial_capital = first_trade.entry_price * first_trade.contract
         return initial_capital
         
-    def _largest_wining_trade(self) -> float:
+    def _largest_wining_trade(self) -> int:
         """ Calculate largest winning trade of strategy
 
         Returns:
-            float: Largest winning trade of strategy
+            int: Position of the largest winning trade of strategy (None if there is no profit)
         """
-        largest_wining_trade = self.trades.loc[self.trades.profit_percent.idxmax()]
+        largest_wining_trade = self._nanarg(np.nanargmax, self._arrays()["profit_percent"])
         return largest_wining_trade
     
-    def _largest_lossing_trade(self) -> float:
+    def _largest_lossing_trade(self) -> int:
         """ Calculate largest losing trade of strategy
 
         Returns:
-            float: Largest losing trade of strategy
+            int: Position of the largest losing trade of strategy (None if there is no profit)
         """
-        largest_lossing_trade = self.trades.loc[self.trades.profit_percent.idxmin()]
+        largest_lossing_trade = self._nanarg(np.nanargmin, self._arrays()["profit_percent"])
         return largest_lossing_trade
     
     def percentage_compared_to_initial_capital(self, src:float) -> float:
@@ -444,45 +474,72 @@ class Backtest:
         percentage_compared_to_initial_capital = (src / self.initial_capital) * 100
         return percentage_compared_to_initial_capital
     
-    @property
-    def result(self):
+    def _arrays(self) -> dict:
+        """ Convert the columns of trades to numpy arrays once
+
+        Returns:
+            dict: Arrays of profit, contract, profit_percent, draw_down, bars_traded,
+                net profit (profit * contract), the exit mask and the win/lose masks.
+        """
+        arrays = self.__dict__.get("_trades_arrays")
+        if arrays is None:
+            trades = self.trades
+            profit = trades.profit.to_numpy(dtype=float)
+            contract = trades.contract.to_numpy(dtype=float)
+            profit_percent = trades.profit_percent.to_numpy(dtype=float)
+            arrays = {
+                "profit": profit,
+                "contract": contract,
+                "profit_percent": profit_percent,
+                "draw_down": trades.draw_down.to_numpy(dtype=float),
+                "bars_traded": trades.bars_traded.to_numpy(dtype=float),
+                "net": profit * contract,
+                "exit": ~pd.isna(trades.exit_date).to_numpy(),
+                "win": profit > 0,
+                "lose": profit <= 0,
+                "win_percent": profit_percent > 0,
+                "lose_percent": profit_percent <= 0,
+            }
+            self._trades_arrays = arrays
+        return arrays
+
+    @staticmethod
+    def _nanmean(values:np.ndarray) -> float:
+        """ Mean of values skipping NaN (NaN if there is no value) """
+        values = values[~np.isnan(values)]
+        return values.sum() / values.size if values.size else np.nan
+
+    @staticmethod
+    def _nanreduce(func, values:np.ndarray) -> float:
+        """ Reduce values skipping NaN (NaN if there is no value) """
+        values = values[~np.isnan(values)]
+        return func(values) if values.size else np.nan
+
+    @staticmethod
+    def _nanarg(func, values:np.ndarray) -> int:
+        """ Position of func (np.nanargmax/np.nanargmin) or None if all values are NaN """
+        return func(values) if (~np.isnan(values)).any() else None
+
+    def result(self, metrics:list=None, profile:str=None) -> dict:
         """Get result of strategy
 
+        Args:
+            metrics (list): Names of the metrics that you want (default all of them).
+            profile (str): Name of a subset of metrics in Backtest.profiles (e.g. 'rank').
+
         Returns:
-            dict: Return all attributes of strategy.
-        """
-        result = {
-            'initial_capital':self.initial_capital, 
-            'net_profit':self.net_profit, 
-            'net_profit_percent':self.net_profit_percent,
-            'gross_profit':self.gross_profit,
-            'gross_profit_percent':self.gross_profit_percent,
-            'gross_loss':self.gross_loss,
-            'gross_loss_percent':self.gross_loss_percent,
-            'max_draw_down':self.max_draw_down,
-            'buy_and_hold_return': self.buy_and_hold_return,
-            'buy_and_hold_return_percent':self.buy_and_hold_return_percent,
-            'profit_factor':self.profit_factor,
-            'max_contract_held':self.max_contract_held,
-            'total_closed_trades':self.total_closed_trades,
-            'total_open_trades':self.total_open_trades,
-            'number_wining_trades':self.number_wining_trades,
-            'number_losing_trades':self.number_losing_trades,
-            'percent_profitable':self.percent_profitable,
-            'avg_trade':self.avg_trade,
-            'avg_trade_percent':self.avg_trade_percent,
-            'avg_wining_trade':self.avg_wining_trade,
-            'avg_wining_trade_percent':self.avg_wining_trade_percent,
-            'avg_losing_trade':self.avg_losing_trade,
-            'avg_losing_trade_percent':self.avg_losing_trade_percent,
-            'largest_wining_trade':self.largest_wining_trade,
-            'largest_wining_trade_percent':self.largest_wining_trade_percent,
-            'largest_lossing_trade':self.largest_lossing_trade,
-            'largest_lossing_trade_percent':self.largest_lossing_trade_percent,
-            'ratio_avg_win_divide_avg_lose':self.ratio_avg_win_divide_avg_lose,
-            'avg_bars_in_trade':self.avg_bars_in_trade,
-            'avg_bars_in_wining_trade':self.avg_bars_in_wining_trade,
-            'avg_bars_in_losing_trade':self.avg_bars_in_losing_trade,
-        }
-
-        return result
\ No newline at end of file
+            dict: Return the requested attributes of strategy.
+        """
+        if metrics is not None and profile is not None:
+            raise ValueError("metrics and profile cannot be set at the same time.")
+        if profile is not None:
+            if profile not in self.profiles:
+                raise ValueError(f"The profile must be one of {list(self.profiles)}.")
+            metrics = self.profiles[profile]
+        elif metrics is None:
+            metrics = self.metrics
+        wrong_metrics = [metric for metric in metrics if metric not in self.metrics]
+        if wrong_metrics:
+            raise ValueError(f"Unknown metrics: {wrong_metrics}")
+
+        return {metric: getattr(self, metric) for metric in metrics}
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+from strategy_tester.backtest import Backtest
+
+
+class BatchBacktest:
+    """ Class to backtest many parameter sets at once
+
+    Description:
+        Calculate every metric of Backtest.result for all parameter sets of a sweep
+        with grouped numpy reductions (np.bincount and ufunc.reduceat) instead of
+        creating one Backtest per parameter set.
+        The metrics are equal to Backtest.result up to the floating point order of the sums.
+
+    Attributes:
+        trades (pd.DataFrame): Dataframe with the trades of all parameter sets
+            (the columns of Backtest.trades and the id column of the parameter set)
+        candles (pd.DataFrame): Dataframe with candles
+        initial_capital (float or pd.Series): Initial capital (or initial capital per parameter set id)
+        id_column (str): Name of the column of the parameter set id
+    """
+    def __init__(self, trades:pd.DataFrame, candles:pd.DataFrame, initial_capital:float or pd.Series, id_column:str="parameters_id"):
+        self.trades = Backtest._validate_trades(trades)
+        if id_column not in trades.columns:
+            raise ValueError(f"Trades are missing the id column: {id_column}")
+        self.id_column = id_column
+        if Backtest._validate_candles(candles):
+            self.start_candle = candles.iloc[0]
+            self.end_candle = candles.iloc[-1]
+        codes, self.ids = pd.factorize(trades[id_column], sort=True)
+        self.codes = codes
+        self.size = len(self.ids)
+        self.initial_capital = self._validate_initial_capital(initial_capital)
+        # Order of the trades grouped by parameter set (stable, keeps the order of trades)
+        self.order = np.argsort(codes, kind="stable")
+        self.counts = np.bincount(codes, minlength=self.size)
+        self.starts = np.r_[0, np.cumsum(self.counts)[:-1]]
+
+    def _validate_initial_capital(self, initial_capital) -> np.ndarray:
+        """ Return the initial capital of each parameter set """
+        if isinstance(initial_capital, (pd.Series, dict)):
+            initial_capital = pd.Series(initial_capital).reindex(self.ids)
+            if initial_capital.isna().any():
+                raise ValueError("Initial capital is missing for some parameter sets")
+            return initial_capital.to_numpy(dtype=float)
+        return np.full(self.size, float(initial_capital))
+
+    def _sum(self, values:np.ndarray, mask:np.ndarray=None) -> np.ndarray:
+        """ Sum of values per parameter set skipping NaN """
+        valid = ~np.isnan(values) if mask is None else mask & ~np.isnan(values)
+        return np.bincount(self.codes, weights=np.where(valid, values, 0), minlength=self.size)
+
+    def _count(self, mask:np.ndarray) -> np.ndarray:
+        """ Number of True values per parameter set """
+        return np.bincount(self.codes, weights=mask, minlength=self.size).astype(np.int64)
+
+    def _mean(self, values:np.ndarray, mask:np.ndarray=None) -> np.ndarray:
+        """ Mean of values per parameter set skipping NaN (NaN if there is no value) """
+        valid = ~np.isnan(values) if mask is None else mask & ~np.isnan(values)
+        count = self._count(valid)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count > 0, self._sum(values, valid) / count, np.nan)
+
+    def _reduce(self, ufunc, values:np.ndarray, fill:float) -> np.ndarray:
+        """ Reduce values per parameter set with ufunc.reduceat skipping NaN """
+        nan = np.isnan(values)
+        reduced = ufunc.reduceat(np.where(nan, fill, values)[self.order], self.starts)
+        return np.where(self._count(~nan) > 0, reduced, np.nan)
+
+    def _arg(self, values:np.ndarray, extreme:np.ndarray) -> np.ndarray:
+        """ Position of the first trade equal to the extreme of its parameter set (-1 if none) """
+        positions = np.where(values == extreme[self.codes], np.arange(len(values)), len(values))
+        first = np.minimum.reduceat(positions[self.order], self.starts)
+        return np.where(first < len(values), first, -1)
+
+    @staticmethod
+    def _take(values:np.ndarray, positions:np.ndarray) -> np.ndarray:
+        return np.where(positions >= 0, values[positions], np.nan)
+
+    def result(self) -> pd.DataFrame:
+        """Get result of all parameter sets
+
+        Returns:
+            pd.DataFrame: The metrics of Backtest.result (columns) for each parameter set id (index).
+        """
+        trades = self.trades
+        profit = trades.profit.to_numpy(dtype=float)
+        contract = trades.contract.to_numpy(dtype=float)
+        profit_percent = trades.profit_percent.to_numpy(dtype=float)
+        draw_down = trades.draw_down.to_numpy(dtype=float)
+        bars_traded = trades.bars_traded.to_numpy(dtype=float)
+        net = profit * contract
+        exit_mask = ~pd.isna(trades.exit_date).to_numpy()
+        win = profit > 0
+        lose = profit <= 0
+        initial_capital = self.initial_capital
+
+        net_profit = self._sum(net)
+        gross_profit = self._sum(net, win)
+        gross_loss = self._sum(net, lose)
+        total_closed_trades = self._count(exit_mask)
+        number_wining_trades = self._count(win)
+        avg_wining_trade = self._mean(net, win)
+        avg_losing_trade = self._mean(net, lose)
+        largest_wining = self._arg(profit_percent, self._reduce(np.fmax, profit_percent, -np.inf))
+        largest_lossing = self._arg(profit_percent, self._reduce(np.fmin, profit_percent, np.inf))
+        buy_and_hold_return = self.end_candle.close - self.start_candle.open
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = {
+                'initial_capital': initial_capital,
+                'net_profit': net_profit,
+                'net_profit_percent': net_profit / initial_capital * 100,
+                'gross_profit': gross_profit,
+                'gross_profit_percent': gross_profit / initial_capital * 100,
+                'gross_loss': gross_loss,
+                'gross_loss_percent': gross_loss / initial_capital * 100,
+                'max_draw_down': self._reduce(np.fmin, draw_down, np.inf),
+                'buy_and_hold_return': buy_and_hold_return,
+                'buy_and_hold_return_percent': buy_and_hold_return * 100 / self.start_candle.open,
+                'profit_factor': np.where(gross_loss != 0, gross_profit / np.abs(gross_loss), gross_profit),
+                'max_contract_held': self._reduce(np.fmax, contract, -np.inf),
+                'total_closed_trades': total_closed_trades,
+                'total_open_trades': self.counts - total_closed_trades,
+                'number_wining_trades': number_wining_trades,
+                'number_losing_trades': self._count(lose),
+                'percent_profitable': np.where(total_closed_trades != 0, number_wining_trades * 100 / total_closed_trades, 0),
+                'avg_trade': self._mean(net),
+                'avg_trade_percent': self._mean(profit_percent),
+                'avg_wining_trade': avg_wining_trade,
+                'avg_wining_trade_percent': self._mean(profit_percent, profit_percent > 0),
+                'avg_losing_trade': avg_losing_trade,
+                'avg_losing_trade_percent': self._mean(profit_percent, profit_percent <= 0),
+                'largest_wining_trade': self._take(net, largest_wining),
+                'largest_wining_trade_percent': self._take(profit_percent, largest_wining),
+                'largest_lossing_trade': self._take(net, largest_lossing),
+                'largest_lossing_trade_percent': self._take(profit_percent, largest_lossing),
+                'ratio_avg_win_divide_avg_lose': np.where(avg_losing_trade != 0, avg_wining_trade / np.abs(avg_losing_trade), 0),
+                'avg_bars_in_trade': self._mean(bars_traded),
+                'avg_bars_in_wining_trade': self._mean(bars_traded, win),
+                'avg_bars_in_losing_trade': self._mean(bars_traded, lose),
+            }
+
+        return pd.DataFrame(result, index=pd.Index(self.ids, name=self.id_column), columns=list(Backtest.metrics))
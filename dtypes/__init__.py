@@ -0,0 +1 @@
+from .dtype_policy import DtypePolicy
@@ -0,0 +1,210 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+class DtypePolicy:
+    """ DtypePolicy class.
+
+    Description:
+        This class decides the dtypes used for the indicators, the conditions
+        and the timestamps of a strategy.
+        The default policy keeps everything as it is (float64),
+        `DtypePolicy.compact()` returns the memory friendly policy
+        (float32 indicators, bool conditions, int64 millisecond timestamps
+        and only the candle columns that the strategies use).
+
+    Precision check:
+        When indicators are downcast to float32, the downcast values are
+        compared with the float64 values with
+        `np.allclose(float64, float32, rtol=rtol, atol=atol, equal_nan=True)`.
+        If the check fails (e.g. prices with too many significant digits or
+        cumulative indicators with large values), the float64 values are kept
+        and a warning is raised, so the float32 path never silently changes
+        the result of a strategy more than the tolerance.
+
+    Attributes:
+        indicators: str
+            The dtype of the indicator outputs ('float64' or 'float32').
+        conditions: str
+            The dtype of the boolean conditions ('bool' or 'keep' as they are).
+        timestamps: str
+            The dtype of the 'date' and 'close_time' columns
+            in the candles and the conditions ('float64' or 'int64').
+        prices: str
+            The dtype of the prices and the volume of the candles ('float64' or 'float32'),
+            float32 is checked like the indicators.
+        candles: str
+            The columns of the candles, 'all' or 'required' to drop the columns that
+            the strategies don't use (qav, num_trades, taker_base_vol, ...).
+        rtol: float
+            The relative tolerance of the precision check.
+        atol: float
+            The absolute tolerance of the precision check.
+    """
+    timestamp_columns = ('date', 'close_time')
+    price_columns = ('open', 'high', 'low', 'close', 'volume')
+    required_columns = ('date', 'open', 'high', 'low', 'close', 'volume', 'close_time')
+
+    def __init__(self,
+                 indicators: str = "float64",
+                 conditions: str = "keep",
+                 timestamps: str = "float64",
+                 prices: str = "float64",
+                 candles: str = "all",
+                 rtol: float = 1e-5,
+                 atol: float = 1e-8):
+        self.indicators = self._validate(indicators, ("float64", "float32"))
+        self.conditions = self._validate(conditions, ("keep", "bool"))
+        self.timestamps = self._validate(timestamps, ("float64", "int64"))
+        self.prices = self._validate(prices, ("float64", "float32"))
+        self.candles = self._validate(candles, ("all", "required"))
+        self.rtol = rtol
+        self.atol = atol
+
+    @classmethod
+    def compact(cls, rtol: float = 1e-5, atol: float = 1e-8,
+                prices: str = "float64") -> "DtypePolicy":
+        """Return the compact policy (float32/bool/int64, required candle columns, optional float32 prices)."""
+        return cls(indicators="float32",
+                   conditions="bool",
+                   timestamps="int64",
+                   prices=prices,
+                   candles="required",
+                   rtol=rtol,
+                   atol=atol)
+
+    @classmethod
+    def from_value(cls, value) -> "DtypePolicy":
+        """
+        Convert the value to DtypePolicy.
+
+        Parameters
+        ----------
+        value: DtypePolicy or str or None
+            The policy, or its name ('float64' or 'compact').
+        """
+        if value is None or value == "float64":
+            return cls()
+        if value == "compact":
+            return cls.compact()
+        if isinstance(value, cls):
+            return value
+        raise ValueError(
+            "The dtype policy must be a DtypePolicy, 'float64' or 'compact'.")
+
+    @staticmethod
+    def _validate(value: str, options: tuple) -> str:
+        if value not in options:
+            raise ValueError(f"The dtype must be one of {options}.")
+        return value
+
+    @property
+    def is_default(self) -> bool:
+        return self.indicators == "float64" and self.conditions == "keep" \
+            and self.timestamps == "float64" and self.prices == "float64" \
+            and self.candles == "all"
+
+    def precision_check(self, reference: np.ndarray,
+                        candidate: np.ndarray) -> bool:
+        """
+        Check the candidate values against the float64 reference values.
+
+        Returns
+        -------
+        bool
+            True if all values are close within rtol/atol (NaN == NaN).
+        """
+        return bool(
+            np.allclose(reference,
+                        candidate,
+                        rtol=self.rtol,
+                        atol=self.atol,
+                        equal_nan=True))
+
+    def _downcast(self, src: pd.Series, kind: str = "indicator") -> pd.Series:
+        """Downcast a float64 series to float32 if it passes the precision check."""
+        if src.dtype != np.float64:
+            return src
+        values = src.to_numpy()
+        compact = values.astype(np.float32)
+        if not self.precision_check(values, compact):
+            warnings.warn(
+                f"The {kind} {src.name} does not pass the float32 precision check, "
+                "the float64 values are kept.")
+            return src
+        return pd.Series(compact, index=src.index, name=src.name)
+
+    def cast_indicator(self, result: pd.Series or pd.DataFrame):
+        """
+        Cast the output of an indicator according to the policy.
+
+        Parameters
+        ----------
+        result: pd.Series or pd.DataFrame
+            The output of the indicator.
+        """
+        if self.indicators == "float64":
+            return result
+        if isinstance(result, pd.DataFrame):
+            return pd.concat(
+                [self._downcast(result[column]) for column in result.columns],
+                axis=1)
+        if isinstance(result, pd.Series):
+            return self._downcast(result)
+        return result
+
+    def cast_condition(self, condition: pd.Series) -> pd.Series:
+        """
+        Cast a condition according to the policy.
+
+        Description:
+            Boolean conditions that became object dtype (e.g. by `shift()`)
+            are converted to bool (NaN is False), other numeric conditions are
+            casted like the indicators.
+        """
+        if not isinstance(condition, pd.Series) or self.conditions == "keep":
+            return condition
+        if condition.dtype == bool:
+            return condition
+        if condition.dtype == object:
+            values = condition.dropna()
+            if values.map(type).isin([bool, np.bool_]).all():
+                return condition.fillna(False).astype(bool)
+            return condition
+        return self.cast_indicator(condition)
+
+    def cast_timestamps(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Cast the timestamp columns of the data according to the policy."""
+        if self.timestamps == "float64":
+            return data
+        columns = {
+            column: np.int64
+            for column in self.timestamp_columns
+            if column in data.columns and data[column].dtype != np.int64
+        }
+        if not columns:
+            return data
+        return data.astype(columns)
+
+    def cast_candles(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cast the candles according to the policy.
+
+        Description:
+            Drop the columns that are not required (candles='required'),
+            cast the timestamps to int64 and the prices and the volume to float32
+            (each column that fails the precision check stays float64).
+            The columns that already have their dtype are not copied.
+        """
+        if self.candles == "required" and not set(data.columns) <= set(self.required_columns):
+            data = data[[column for column in data.columns if column in self.required_columns]]
+        data = self.cast_timestamps(data)
+        if self.prices == "float32":
+            columns = {
+                column: self._downcast(data[column], "column").to_numpy()
+                for column in self.price_columns if column in data.columns
+            }
+            data = data.assign(**columns)
+        return data
@@ -0,0 +1 @@
+from .equity_curve import EquityCurve
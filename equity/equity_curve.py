@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+
+class EquityCurve:
+    """ Class to calculate the bar-by-bar equity curve of a strategy
+
+    Description:
+        The position of each candle is built from the trades with np.add.at and a
+        cumulative sum, and the equity is marked to market on the close of every candle:
+            equity[t] = initial_capital + sum(position[t-1] * (close[t] - close[t-1]))
+        Entries and exits are at the close of the candles, so the equity at the end
+        equals initial_capital plus the profit of the trades (commission is not included,
+        like Backtest). All risk metrics are computed from the equity in O(N).
+
+    Attributes:
+        trades (pd.DataFrame): Dataframe with trades (type, entry_date, exit_date, contract)
+        candles (pd.DataFrame): Dataframe with candles (date, close, close_time)
+        initial_capital (float): Initial capital of strategy
+    """
+    year_ms = 365 * 24 * 60 * 60 * 1000
+
+    def __init__(self, trades:pd.DataFrame, candles:pd.DataFrame, initial_capital:float):
+        self.initial_capital = initial_capital
+        self.dates = candles.date.to_numpy(dtype=float)
+        self.close = candles.close.to_numpy(dtype=float)
+        self.position = self._position(trades, candles.close_time.to_numpy(dtype=float))
+        pnl = self.position[:-1] * np.diff(self.close)
+        self.equity = initial_capital + np.r_[0.0, np.cumsum(pnl)]
+
+    @staticmethod
+    def _position(trades:pd.DataFrame, close_time:np.ndarray) -> np.ndarray:
+        """ Calculate the signed contract held at the close of each candle
+
+        Description:
+            The dates of the trades are the close_time of the candles rounded to 1 second,
+            so the candle of a date is the first candle with close_time >= date - 500ms.
+        """
+        size = len(close_time)
+        delta = np.zeros(size + 1)
+        if trades.empty:
+            return delta[:-1]
+        direction = np.where(trades.type.to_numpy() == "long", 1.0, -1.0)
+        contract = trades.contract.to_numpy(dtype=float) * direction
+        entry = np.searchsorted(close_time, trades.entry_date.to_numpy(dtype=float) - 500)
+        exit_date = trades.exit_date.to_numpy(dtype=float)
+        exit_ = np.where(np.isnan(exit_date), size,
+                         np.searchsorted(close_time, exit_date - 500))
+        np.add.at(delta, np.minimum(entry, size), contract)
+        np.add.at(delta, np.minimum(exit_, size), -contract)
+        return np.cumsum(delta)[:-1]
+
+    def series(self) -> pd.Series:
+        """ Return the equity as a series indexed by the date of the candles """
+        return pd.Series(self.equity,
+                         index=pd.to_datetime(self.dates, unit="ms").round("1s"),
+                         name="equity")
+
+    @property
+    def periods_per_year(self) -> float:
+        """ Number of candles in a year (the markets are open 24/7) """
+        if len(self.dates) < 2:
+            return np.nan
+        return self.year_ms / np.median(np.diff(self.dates))
+
+    def metrics(self) -> dict:
+        """ Calculate the risk-adjusted metrics of the equity in one pass
+
+        Returns:
+            dict: sharpe_ratio, sortino_ratio, calmar_ratio, cagr_percent,
+                max_equity_draw_down, max_equity_draw_down_percent,
+                max_draw_down_duration (candles), volatility_percent (annualized)
+        """
+        equity = self.equity
+        periods = self.periods_per_year
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = equity[1:] / equity[:-1] - 1
+            mean = returns.mean() if returns.size else np.nan
+            std = returns.std(ddof=1) if returns.size > 1 else np.nan
+            downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2)) if returns.size else np.nan
+
+            peak = np.maximum.accumulate(equity)
+            draw_down = equity - peak
+            draw_down_percent = draw_down / peak * 100
+            max_draw_down_percent = draw_down_percent.min()
+
+            # Longest run of candles under the previous peak
+            under = draw_down < 0
+            run_start = np.maximum.accumulate(np.where(under, 0, np.arange(len(equity))))
+            duration = np.where(under, np.arange(len(equity)) - run_start, 0)
+
+            years = len(equity) / periods
+            cagr = ((equity[-1] / equity[0]) ** (1 / years) - 1) * 100 if years > 0 else np.nan
+
+            return {
+                'sharpe_ratio': mean / std * np.sqrt(periods) if std else np.nan,
+                'sortino_ratio': mean / downside * np.sqrt(periods) if downside else np.nan,
+                'calmar_ratio': cagr / abs(max_draw_down_percent) if max_draw_down_percent else np.nan,
+                'cagr_percent': cagr,
+                'volatility_percent': std * np.sqrt(periods) * 100,
+                'max_equity_draw_down': draw_down.min(),
+                'max_equity_draw_down_percent': max_draw_down_percent,
+                'max_draw_down_duration': int(duration.max()) if duration.size else 0,
+            }
@@ -1 +1,6 @@
-from .datahandler import DataHandler
\ No newline at end of file
+from .datahandler import DataHandler
+from .resampler import Resampler
+from .kline_downloader import KlineDownloader
+from .gap_index import GapIndex
+from .bar_aggregator import BarAggregator
+from .exchange_info import ExchangeInfo
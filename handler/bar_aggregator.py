@@ -0,0 +1,230 @@
+import io
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+
+class BarAggregator:
+    """
+    BarAggregator constructor.
+
+    Description:
+        Aggregate trade ticks (the trades/aggTrades files of Binance, csv, zipped csv or parquet)
+        into information-driven bars instead of time bars:
+            tick: a bar every `threshold` trades
+            volume: a bar every `threshold` of base volume
+            dollar: a bar every `threshold` of quote volume (price * quantity)
+            range: a bar when its high - low reaches `threshold`
+        The files are streamed chunk by chunk. For tick/volume/dollar bars the bars close at
+        the trades where the cumulative sum of the measure crosses the multiples of the threshold
+        (found with searchsorted), so the remainder of a bar is carried to the next one.
+        The trades of the bar in progress are carried to the next chunk (and file).
+        The bars have the columns of the candles ['date', 'open', 'high', 'low', 'close', 'volume', 'close_time']
+        (plus qav and num_trades), so they can be passed to DataHandler and the strategies unchanged.
+
+    Attributes:
+        kind: str
+            'tick', 'volume', 'dollar' or 'range'.
+        threshold: float
+            The size of a bar.
+        chunk_size: int
+            The number of trades read at a time.
+    """
+    kinds = ('tick', 'volume', 'dollar', 'range')
+    # Names of the columns in the files with a header
+    names = {
+        'price': ('price', ),
+        'quantity': ('qty', 'quantity'),
+        'time': ('time', 'transact_time', 'timestamp'),
+    }
+    # Positions of the columns in the files without a header (by number of columns)
+    positions = {
+        8: {'price': 1, 'quantity': 2, 'time': 5},  # aggTrades
+        7: {'price': 1, 'quantity': 2, 'time': 4},  # trades
+        6: {'price': 1, 'quantity': 2, 'time': 4},  # trades (older files)
+    }
+
+    def __init__(self, kind: str, threshold: float, chunk_size: int = 1 << 20):
+        if kind not in self.kinds:
+            raise ValueError(f"The kind must be one of {self.kinds}.")
+        if threshold <= 0:
+            raise ValueError("The threshold must be positive.")
+        self.kind = kind
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+
+    def _columns(self, first_line: str) -> tuple:
+        """Return (header, usecols) of a csv from its first line."""
+        fields = [field.strip().lower() for field in first_line.split(",")]
+        header = not fields[0].lstrip("-").replace(".", "", 1).isdigit()
+        if header:
+            usecols = []
+            for column, names in self.names.items():
+                try:
+                    usecols.append(next(fields.index(name) for name in names if name in fields))
+                except StopIteration:
+                    raise ValueError(f"The trades have no {column} column.")
+        else:
+            if len(fields) not in self.positions:
+                raise ValueError("The trades must be a trades or aggTrades file of Binance.")
+            usecols = [self.positions[len(fields)][column] for column in self.names]
+        return header, usecols
+
+    def _csv(self, stream) -> iter:
+        if not isinstance(stream, io.TextIOBase):
+            stream = io.TextIOWrapper(stream)
+        first_line = stream.readline()
+        header, usecols = self._columns(first_line)
+        dtype = {position: np.float64 for position in usecols}
+        if not header:
+            yield self._arrays(pd.read_csv(io.StringIO(first_line), header=None, usecols=usecols, dtype=dtype)[usecols])
+        for chunk in pd.read_csv(stream, header=None, usecols=usecols, dtype=dtype, chunksize=self.chunk_size):
+            # usecols keeps the order of the file, restore the order price, quantity, time
+            yield self._arrays(chunk[usecols])
+
+    @staticmethod
+    def _arrays(chunk: pd.DataFrame) -> tuple:
+        """Return (time, price, quantity) of a chunk with the columns price, quantity, time."""
+        price, quantity, time = chunk.to_numpy(dtype=np.float64).T
+        if time.size and time[0] > 10**14:
+            # The spot files since 2025 are in microseconds
+            time = time // 1000
+        return time, price, quantity
+
+    def read(self, path: str) -> iter:
+        """
+        Stream the trades of a file.
+
+        Yields
+        ------
+        tuple
+            The arrays (time, price, quantity) of each chunk.
+        """
+        if path.endswith(".parquet"):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Reading parquet files needs pyarrow.")
+            parquet = pq.ParquetFile(path)
+            columns = [next(name for name in names if name in parquet.schema.names)
+                       for names in self.names.values()]
+            for batch in parquet.iter_batches(batch_size=self.chunk_size, columns=columns):
+                yield self._arrays(batch.to_pandas()[columns])
+        elif path.endswith(".zip"):
+            with zipfile.ZipFile(path) as archive:
+                members = [name for name in archive.namelist() if name.endswith(".csv")]
+                if len(members) != 1:
+                    raise ValueError(f"The archive {path} must have one csv file.")
+                with archive.open(members[0]) as stream:
+                    yield from self._csv(stream)
+        else:
+            with open(path) as stream:
+                yield from self._csv(stream)
+
+    def _ends(self, time: np.ndarray, price: np.ndarray, quantity: np.ndarray, offset: float) -> tuple:
+        """
+        Find the last trade of each complete bar.
+
+        Returns
+        -------
+        tuple
+            The positions of the last trades and the offset of the measure after the last bar.
+        """
+        if self.kind == "range":
+            return self._range_ends(price), 0.0
+        if self.kind == "tick":
+            measure = np.ones(len(price))
+        elif self.kind == "volume":
+            measure = quantity
+        else:
+            measure = price * quantity
+        cumulative = offset + np.cumsum(measure)
+        first = np.floor(offset / self.threshold) + 1
+        last = np.floor(cumulative[-1] / self.threshold)
+        if last < first:
+            return np.empty(0, dtype=np.int64), offset
+        crossings = np.arange(first, last + 1) * self.threshold
+        # A trade that crosses several multiples closes one bar
+        ends = np.unique(np.searchsorted(cumulative, crossings, side="left"))
+        return ends, cumulative[ends[-1]]
+
+    def _range_ends(self, price: np.ndarray) -> np.ndarray:
+        """Find the last trade of each range bar (the first trade where high - low >= threshold)."""
+        ends = []
+        start = 0
+        size = len(price)
+        while start < size:
+            window = 1024
+            while True:
+                stop = min(start + window, size)
+                prices = price[start:stop]
+                spread = np.maximum.accumulate(prices) - np.minimum.accumulate(prices)
+                position = int(np.argmax(spread >= self.threshold))
+                if spread[position] >= self.threshold:
+                    ends.append(start + position)
+                    start = start + position + 1
+                    break
+                if stop == size:
+                    return np.array(ends, dtype=np.int64)
+                window *= 2
+        return np.array(ends, dtype=np.int64)
+
+    @staticmethod
+    def _bars(time: np.ndarray, price: np.ndarray, quantity: np.ndarray, ends: np.ndarray) -> pd.DataFrame:
+        starts = np.r_[0, ends[:-1] + 1]
+        # The trades after the last bar are not reduced into it
+        time, price, quantity = time[:ends[-1] + 1], price[:ends[-1] + 1], quantity[:ends[-1] + 1]
+        return pd.DataFrame({
+            'date': time[starts],
+            'open': price[starts],
+            'high': np.maximum.reduceat(price, starts),
+            'low': np.minimum.reduceat(price, starts),
+            'close': price[ends],
+            'volume': np.add.reduceat(quantity, starts),
+            'close_time': time[ends],
+            'qav': np.add.reduceat(price * quantity, starts),
+            'num_trades': ends - starts + 1,
+        })
+
+    def aggregate(self, paths: list or str, partial: bool = False) -> pd.DataFrame:
+        """
+        Aggregate the trades of the files into bars.
+
+        Parameters
+        ----------
+        paths: list or str
+            The files of the trades, they are read in the order of their names.
+        partial: bool
+            If True, the last bar is returned even if it is not complete.
+
+        Returns
+        -------
+        DataFrame
+            The bars with the columns ['date', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'qav', 'num_trades'].
+        """
+        paths = [paths] if isinstance(paths, str) else sorted(paths, key=os.path.basename)
+        bars = []
+        carried = (np.empty(0), np.empty(0), np.empty(0))
+        offset = 0.0
+        for path in paths:
+            for chunk in self.read(path):
+                time, price, quantity = (np.r_[previous, values] for previous, values in zip(carried, chunk))
+                if price.size == 0:
+                    continue
+                ends, next_offset = self._ends(time, price, quantity, offset)
+                if ends.size:
+                    bars.append(self._bars(time, price, quantity, ends))
+                    carried = (time[ends[-1] + 1:], price[ends[-1] + 1:], quantity[ends[-1] + 1:])
+                    offset = next_offset
+                else:
+                    carried = (time, price, quantity)
+        if partial and carried[1].size:
+            bars.append(self._bars(*carried, np.array([carried[1].size - 1])))
+        if not bars:
+            return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume',
+                                         'close_time', 'qav', 'num_trades'])
+        bars = pd.concat(bars, ignore_index=True)
+        bars.attrs["bars"] = f"{self.kind}:{self.threshold:g}"
+        return bars
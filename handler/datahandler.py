@@ -1,13 +1,26 @@
+import time
+import warnings
+
 import pandas as pd
 from binance import Client
+from binance.helpers import date_to_milliseconds
 import numpy as np
 
+from strategy_tester.dtypes import DtypePolicy
+from strategy_tester.store import CandleStore, ColumnStore, KlineArchive
+from .kline_downloader import KlineDownloader
+from .resampler import Resampler
+from .gap_index import GapIndex
+from .exchange_info import ExchangeInfo
+
 class DataHandler:
     """
     DataHandler constructor.
     
     Description:
         If the data is not set, get the data BTCUSDT from the binance API.    
+        The closed candles are kept in a local store (partitioned by symbol/interval/month),
+        so only the ranges that are not in the store are downloaded.
         
     Attributes:
         data: DataFrame
@@ -15,8 +28,17 @@ class DataHandler:
             The columns should be ['date', 'open', 'high', 'low', 'close', 'volume'].
         interval: str
             The interval that you want to get the data.
+        store: CandleStore
+            The local store of the candles (None if it is disabled).
+        bars: bool
+            True if the data are the bars of BarAggregator (the interval is e.g. 'volume:1000').
     
     """
+    columns = ['date', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+               'qav', 'num_trades', 'taker_base_vol', 'taker_quote_vol', 'ignore']
+    dtypes = {'date': 'float', 'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64',
+              'volume': 'float64', 'close_time': 'float', 'qav': 'float64', 'num_trades': 'int64',
+              'taker_base_vol': 'float64', 'taker_quote_vol': 'float64', 'ignore': 'float64'}
     intervals = {
         '1m': '6 months ago',
         '3m': '9 months ago',
@@ -45,6 +67,35 @@ class DataHandler:
             The columns should be ['date', 'open', 'high', 'low', 'close', 'volume', 'close_time'].
         interval: str
             The interval that you want to get the data.
+        store: bool or str or CandleStore
+            The local store of the candles, True for ./cache/candles,
+            a directory or False to always download (default True).
+            Note that the default store is relative to the current working directory.
+        mmap: bool
+            If True, the candles of the store are memory-mapped from its snapshot (read-only views
+            shared by all the processes), the candle in progress is not included.
+        downloader: KlineDownloader
+            The downloader of the klines (default a KlineDownloader of Binance).
+        exchange_info: ExchangeInfo
+            The cached exchange information that the symbol is checked with
+            (default the spot information cached in ./cache/exchange_info for an hour).
+        derive: bool
+            If True, every interval is resampled from the 1m candles. The intervals that Binance
+            does not have (e.g. 7m, 2d) are always resampled from the 1m candles.
+        start: int or str or Timestamp
+            The first date (milliseconds or a date string like '2021-01-01'), it replaces months.
+            Only the partitions of the store and the rows that overlap [start, end] are read.
+        end: int or str or Timestamp
+            The last date (default now).
+        dtype_policy: DtypePolicy or str
+            The dtypes and the columns of the candles, 'compact' for int64 timestamps
+            and only the required columns (DtypePolicy.compact(prices="float32") for float32 prices).
+            The columns that are dropped are not read from the store.
+        fill_gaps: str
+            What to do with the missing candles (see DataHandler.gaps):
+            None to keep them (a warning is raised), 'fetch' to get only the missing ranges
+            (from the store, downloading what it doesn't have) or 'fill' to add flat candles.
+            'fetch' uses the symbol, so set it when the data is not BTCUSDT.
         """
         if not params:
             raise ValueError("You need to set the data or the interval.")
@@ -52,6 +103,21 @@ class DataHandler:
         self.symbol = params.get('symbol', "BTCUSDT")
         self.interval = self._validate_interval(params.get("interval", "5m"))
         self.months = self._validate_months(params.get("months", 12))
+        self.start = self._validate_date(params.get("start", None))
+        self.end = self._validate_date(params.get("end", None))
+        if self.start is not None and self.end is not None and self.start > self.end:
+            raise ValueError("The start must be before the end.")
+        self.store = self._validate_store(params.get("store", True))
+        self.mmap = params.get("mmap", False)
+        self._client = None
+        self._downloader = params.get("downloader", None)
+        self.exchange_info = params.get("exchange_info", None) or ExchangeInfo("spot")
+        self._symbol_checked = False
+        self.derive = params.get("derive", False)
+        self.fill_gaps = self._validate_fill_gaps(params.get("fill_gaps", None))
+        self.dtype_policy = DtypePolicy.from_value(params.get("dtype_policy", None))
+        self.gaps = None
+        self.bars = False
         self.data = self._validate_data(params.get("data", None),
                                         params.get("update_data", False))
         
@@ -72,9 +138,43 @@ class DataHandler:
         if interval is None:
             return None
         if interval not in self.intervals.keys():
-            raise ValueError("The interval is not valid.")
+            # Derived from the 1m candles
+            try:
+                Resampler.interval_ms(interval)
+            except ValueError:
+                raise ValueError("The interval is not valid.")
         return interval
     
+    @staticmethod
+    def _validate_date(date) -> float:
+        """Convert a date (milliseconds, a date string or a Timestamp) to milliseconds."""
+        if date is None:
+            return None
+        if isinstance(date, str):
+            return float(date_to_milliseconds(date))
+        if isinstance(date, (pd.Timestamp, np.datetime64)):
+            return float(pd.Timestamp(date).value // 10**6)
+        if isinstance(date, (int, float, np.number)):
+            return float(date)
+        raise TypeError("The start and the end must be milliseconds, a date string or a Timestamp.")
+
+    @property
+    def _start(self) -> int:
+        """The first date in milliseconds (start, or the months ago)."""
+        if self.start is not None:
+            return int(self.start)
+        return date_to_milliseconds(self.months)
+
+    def _slice(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Keep the candles in [start, end] (a binary search on the sorted dates)."""
+        if self.start is None and self.end is None:
+            return data
+        dates = data["date"].to_numpy()
+        first = 0 if self.start is None else int(np.searchsorted(dates, self.start, side="left"))
+        last = len(dates) if self.end is None else int(np.searchsorted(dates, self.end, side="right"))
+        # Slicing keeps the memory-mapped columns as views
+        return data.iloc[first:last]
+
     @staticmethod
     def _validate_months(months:int=None) -> str:
         """Validate the months.
@@ -105,8 +205,8 @@ class DataHandler:
         
         Parameters
         ----------
-        data: DataFrame
-            The data that you want to validate.
+        data: DataFrame or str
+            The data that you want to validate (or the directory of a ColumnStore).
         
         Returns
         -------
@@ -115,6 +215,9 @@ class DataHandler:
         """
         if data is None:
             data = self._get_data(self.interval)
+        elif isinstance(data, str):
+            # A directory of a ColumnStore (e.g. CandleStore.snapshot), the columns are memory-mapped
+            data = ColumnStore.read(data, mmap=True, rows=ColumnStore.bounds(data, self.start, self.end))
     
         if not isinstance(data, pd.DataFrame):
             raise TypeError("The data must be a pandas DataFrame.")
@@ -137,20 +240,188 @@ class DataHandler:
         if np.issubdtype(data['close_time'], np.datetime64):
             data['close_time'] = data['close_time'].astype(np.int64)/10**6
 
+        data = self._slice(data)
+        if data.empty:
+            raise ValueError("The data has no candles between the start and the end.")
+
+        if "bars" in data.attrs:
+            # Bars of BarAggregator (e.g. 'volume:1000') have no interval and no gaps
+            self.interval = data.attrs["bars"]
+            self.bars = True
+            self.gaps = pd.DataFrame(columns=GapIndex.columns)
+            return self.dtype_policy.cast_candles(data)
+
         # Set interval
         self.interval = self._get_interval(data)
 
+        data = self._validate_gaps(data)
+
         if update_data:
             data = self._update_data(data)
 
+        return self.dtype_policy.cast_candles(data)
+
+    @property
+    def _read_columns(self) -> list:
+        """The columns read from the store (None for all of them)."""
+        if self.dtype_policy.candles == "required":
+            return list(DtypePolicy.required_columns)
+        return None
+
+    @staticmethod
+    def _validate_fill_gaps(fill_gaps: str) -> str:
+        if fill_gaps not in (None, False, "fetch", "fill"):
+            raise ValueError("The fill_gaps must be None, 'fetch' or 'fill'.")
+        return fill_gaps or None
+
+    def _validate_gaps(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Build the gap index of the data and fetch or fill the missing candles.
+        
+        Description:
+            Unsorted dates are sorted and the duplicated dates are dropped (the last candle is kept)
+            with a warning, the gap index needs sorted and unique dates.
+        
+        Returns
+        -------
+        DataFrame
+            The data (with the missing candles if they are fetched or filled).
+        """
+        if (np.diff(data["date"].to_numpy()) <= 0).any():
+            warnings.warn("The dates are not sorted or have duplicates, "
+                          "the candles are sorted and the duplicates are dropped (the last one is kept).")
+            data = data.sort_values("date", kind="stable").drop_duplicates("date", keep="last")
+            data = data.reset_index(drop=True)
+        interval_ms = Resampler.interval_ms(self.interval)
+        self.gaps = GapIndex.build(data["date"].to_numpy(), interval_ms)
+        if self.gaps.empty:
+            return data
+        if self.fill_gaps == "fetch":
+            data = self._fetch_gaps(data, interval_ms)
+            self.gaps = GapIndex.build(data["date"].to_numpy(), interval_ms)
+        if self.fill_gaps == "fill" and not self.gaps.empty:
+            data = GapIndex.fill(data, interval_ms)
+            self.gaps = GapIndex.build(data["date"].to_numpy(), interval_ms)
+        if not self.gaps.empty:
+            warnings.warn(
+                f"{self.gaps.missing.sum()} candles are missing in {len(self.gaps)} gaps (see DataHandler.gaps).")
         return data
 
+    def _fetch_gaps(self, data: pd.DataFrame, interval_ms: float) -> pd.DataFrame:
+        """Get only the candles of the gaps (from the store, the ranges that it doesn't have are downloaded)."""
+        ranges = [(int(start + interval_ms), int(end - 1))
+                  for start, end in self.gaps[["start", "end"]].to_numpy()]
+        if self.store is None:
+            frames = [self._klines(self.interval, begin, end) for begin, end in ranges]
+        else:
+            for begin, end in ranges:
+                for missing_begin, missing_end in self.store.missing(self.symbol, self.interval, begin, end):
+                    self.store.write(self.symbol, self.interval,
+                                     self._klines(self.interval, missing_begin, missing_end),
+                                     synced=(missing_begin, missing_end))
+            stored = self.store.read(self.symbol, self.interval)
+            dates = stored["date"].to_numpy()
+            frames = [stored.iloc[np.searchsorted(dates, begin):np.searchsorted(dates, end, side="right")]
+                      for begin, end in ranges]
+        frames = [frame.reindex(columns=data.columns) for frame in frames if not frame.empty]
+        if not frames:
+            return data
+        data = pd.concat([data] + frames, ignore_index=True)
+        return data.drop_duplicates("date").sort_values("date", kind="stable").reset_index(drop=True)
+
+    @staticmethod
+    def _validate_store(store) -> CandleStore:
+        """Validate the store.
+        
+        Parameters
+        ----------
+        store: bool or str or CandleStore
+            True for the default store, a directory, a CandleStore or False/None to disable it.
+        
+        Returns
+        -------
+        CandleStore
+            The store (None if it is disabled).
+        """
+        if store is None or store is False:
+            return None
+        if store is True:
+            return CandleStore()
+        if isinstance(store, str):
+            return CandleStore(store)
+        if isinstance(store, CandleStore):
+            return store
+        raise TypeError("The store must be a bool, a directory or a CandleStore.")
+
+    @classmethod
+    def ingest(cls, paths: list, store=True, processes: int = None) -> list:
+        """Ingest bulk kline archives into the store.
+        
+        Description:
+            The zip archives of data.binance.vision (SYMBOL-INTERVAL-DATE.zip) are streamed
+            chunk by chunk into the store, one process per symbol and interval.
+            Then DataHandler(symbol=..., interval=...) reads them without downloading.
+        
+        Parameters
+        ----------
+        paths: list
+            The archives.
+        store: bool or str or CandleStore
+            The store that the candles are written to.
+        processes: int
+            The number of processes (default the number of cores).
+        
+        Returns
+        -------
+        list
+            The number of rows and the gaps of each symbol and interval.
+        """
+        store = cls._validate_store(store)
+        if store is None:
+            raise ValueError("The archives need a store.")
+        return KlineArchive().ingest_many(store, paths, processes=processes)
+
+    @property
+    def client(self) -> Client:
+        """The binance client (created on the first request)."""
+        if self._client is None:
+            self._client = Client()
+        return self._client
+
+    def _check_symbol(self) -> None:
+        """Check that the exchange has the symbol (a lookup in the cached exchange information)."""
+        if not self._symbol_checked:
+            self.exchange_info.symbol(self.symbol)
+            self._symbol_checked = True
+
+    @property
+    def downloader(self) -> KlineDownloader:
+        """The downloader of the klines (created on the first request)."""
+        if self._downloader is None:
+            self._downloader = KlineDownloader()
+        return self._downloader
+
+    def _klines(self, interval: str, start, end=None) -> pd.DataFrame:
+        """Download the klines of the range of time (pages in parallel) as a DataFrame."""
+        # Check the symbol before the download
+        self._check_symbol()
+        return self._klines_frame(self.downloader.klines(self.symbol, interval, start, end))
+
+    @classmethod
+    def _klines_frame(cls, klines: list) -> pd.DataFrame:
+        """Convert the klines of the binance API to a DataFrame."""
+        if not klines:
+            return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in cls.dtypes.items()})
+        data = pd.DataFrame(klines, columns=cls.columns)
+        return data.astype(cls.dtypes)
+
     def _get_data(self, interval: str) -> pd.DataFrame:
         """
         Get the data from the binance API.
         
         Description:
             Get candlestick BTCUSDT data from the binance API.
+            With a store, only the ranges that are not in the store are downloaded
+            and the closed candles are appended to it.
             
         Parameters
         ----------
@@ -163,32 +434,88 @@ class DataHandler:
             The data from the binance API.
             
         """
-        # Get the data from the binance API.
-        client = Client()
-        
-        # Check if the symbol is valid.
-        list_of_symbols = client.get_exchange_info()['symbols']
-        try:
-            next(item for item in list_of_symbols if item["symbol"] == self.symbol)
-        except StopIteration:
-            raise ValueError(f"The pair {self.symbol} is not supported.")
-        start_time = self.months
-        data = client.get_historical_klines(self.symbol, interval, start_time)
+        if self._is_derived(interval):
+            return self._derive(interval)
+
+        start = self._start
+        if self.store is None:
+            return self._klines(interval, start, self.end)
+
+        open_candles = self._sync(interval, start)
+        if self.mmap:
+            path = self.store.snapshot(self.symbol, interval)
+            if path is None:
+                # Nothing is stored (e.g. the range is before the listing), _validate_data raises that the data is empty
+                return pd.DataFrame(columns=self._read_columns or self.columns)
+            # The rows of the range are views of the memory-mapped snapshot
+            return ColumnStore.read(path, mmap=True, columns=self._read_columns,
+                                    rows=ColumnStore.bounds(path, start, self.end))
+        data = self.store.read(self.symbol, interval, columns=self._read_columns, start=start, end=self.end)
+        if self.end is not None:
+            open_candles = [candles[candles["date"] <= self.end] for candles in open_candles]
+        data = pd.concat([data] + open_candles, ignore_index=True)
+        return data
+
+    def _sync(self, interval: str, start: int) -> list:
+        """Download the ranges that are not in the store and append the closed candles to it.
         
-        # Convert the data to a pandas DataFrame.
-        data = pd.DataFrame(data)
-        data.columns = ['date','open', 'high', 'low', 'close', 'volume','close_time', 'qav','num_trades','taker_base_vol','taker_quote_vol', 'ignore']
-        # data.drop(['qav','num_trades','taker_base_vol','taker_quote_vol', 'ignore'], axis=1, inplace=True)
-        data = data.astype({'date': 'float', 'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64', 'volume': 'float64', 'close_time': 'float'})
+        Returns
+        -------
+        list
+            The candles in progress (DataFrames), they are not stored.
+        """
+        now = int(time.time() * 1000)
+        stop = now if self.end is None else min(int(self.end), now)
+        open_candles = []
+        for begin, end in self.store.missing(self.symbol, interval, start, stop):
+            data = self._klines(interval, begin, end)
+            closed = data["close_time"] < now
+            if not closed.all():
+                # The candle in progress is returned but not stored
+                open_candles.append(data[~closed])
+                end = data.loc[~closed, "date"].min() - 1
+                data = data[closed]
+            self.store.write(self.symbol, interval, data, synced=(begin, end))
+        return open_candles
+
+    def _derive(self, interval: str) -> pd.DataFrame:
+        """Resample the 1m candles to the interval.
         
-        return data
+        Description:
+            With a store, the 1m candles are synced and the resampled candles are cached
+            in the store (until new 1m candles are stored).
+            The first candle may be partial if the 1m candles start inside it,
+            the last candle is dropped until all of its 1m candles are closed.
+        """
+        start = self._start
+        if self.store is None:
+            return self._resample_klines(interval, start, self.end)
+
+        self._sync("1m", start)
+        path = self.store.derived(self.symbol, interval)
+        if path is None:
+            # No 1m candles are stored, _validate_data raises that the data is empty
+            return pd.DataFrame(columns=self._read_columns or self.columns)
+        return ColumnStore.read(path, mmap=self.mmap, columns=self._read_columns,
+                                rows=ColumnStore.bounds(path, start, self.end))
+
+    def _is_derived(self, interval: str) -> bool:
+        """Check if the interval is resampled from the 1m candles."""
+        return interval != "1m" and (self.derive or interval not in self.intervals)
+
+    def _resample_klines(self, interval: str, start, end=None) -> pd.DataFrame:
+        """Download the 1m klines of the range and resample them (without the candle that is not closed)."""
+        data = self._klines("1m", start, end)
+        if data.empty:
+            return data
+        return Resampler.closed(Resampler.resample(data, interval), data).reset_index(drop=True)
 
     def _update_data(self, data:pd.DataFrame) -> pd.DataFrame:
         """
         Update the data.
         
         Description:
-            Update the data.
+            Update the data with the candles after its last candle (until the end if it is set).
             
         Parameters
         ----------
@@ -201,13 +528,15 @@ class DataHandler:
             The updated data.
         """
         start_time = int(data.iloc[-1]["close_time"])
-        client = Client()
-        update_data = client.get_historical_klines(self.symbol, self.interval, start_time)
-        # Convert the data to a pandas DataFrame.
-        update_data = pd.DataFrame(update_data)
-        update_data.columns = ['date','open', 'high', 'low', 'close', 'volume','close_time', 'qav','num_trades','taker_base_vol','taker_quote_vol', 'ignore']
-        # data.drop(['qav','num_trades','taker_base_vol','taker_quote_vol', 'ignore'], axis=1, inplace=True)
-        update_data = update_data.astype({'date': 'float', 'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64', 'volume': 'float64', 'close_time': 'float'})
+        if self.end is not None and start_time >= self.end:
+            return data
+        if self._is_derived(self.interval):
+            # Binance doesn't have the derived intervals (e.g. 7m, 2d)
+            update_data = self._resample_klines(self.interval, start_time + 1, self.end)
+        else:
+            update_data = self._klines(self.interval, start_time, self.end)
+        if self.end is not None:
+            update_data = update_data[update_data["date"] <= self.end]
         
         # Combine the data.
         data = pd.concat([data, update_data], ignore_index=True)
@@ -233,39 +562,14 @@ class DataHandler:
         if isinstance(data, pd.Series):
             data = data.reset_index()
             
-        # Calculate the interval milliseconds
-        interval = data.date.iloc[0:2].diff().iat[1]
-        # Convert to interval string
-        interval = interval / (1000 * 60)
-        if interval == 1:
-            interval = '1m'
-        elif interval == 3:
-            interval = '3m'
-        elif interval == 5:
-            interval = '5m'
-        elif interval == 15:
-            interval = '15m'
-        elif interval == 30:
-            interval = '30m'
-        elif interval == 60:
-            interval = '1h'
-        elif interval == 120:
-            interval = '2h'
-        elif interval == 240:
-            interval = '4h'
-        elif interval == 360:
-            interval = '6h'
-        elif interval == 480:
-            interval = '8h'
-        elif interval == 720:
-            interval = '12h'
-        elif interval == 1440:
-            interval = '1d'
-        elif interval == 4320:
-            interval = '3d'
-        elif interval == 10080:
-            interval = '1w'
-        else:
+        # Calculate the interval milliseconds (the modal delta, robust to gaps)
+        interval = GapIndex.interval_ms(data.date.to_numpy())
+        # Convert to interval string (e.g. 1m, 4h, 1d, or a derived interval like 7m)
+        if interval != int(interval):
+            raise ValueError("The interval is not valid.")
+        try:
+            interval = Resampler.name(int(interval))
+        except ValueError:
             raise ValueError("The interval is not valid.")
 
         return interval
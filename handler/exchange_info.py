@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+
+
+class ExchangeInfo:
+    """
+    ExchangeInfo constructor.
+
+    Description:
+        Cache the exchange information of Binance (the symbols and their filters) with a TTL.
+        The payload covers thousands of symbols, so it is fetched once per TTL and kept
+        in memory (shared by all the instances of the process) and on disk
+        ({root}/{market}.json, shared by the processes and the runs).
+        The symbols are indexed in a dict, so checking a symbol is a lookup.
+
+    Attributes:
+        market: str
+            'spot' or 'futures'.
+        root: str
+            The directory of the cache on disk (None to keep it only in memory).
+        ttl: float
+            The seconds after which the information is fetched again.
+    """
+    markets = ('spot', 'futures')
+    ttl = 3600
+    # {(market, root): (fetched time, {symbol: info})}
+    _memory = {}
+    _lock = threading.Lock()
+
+    def __init__(self, market: str = "spot", root: str = "./cache/exchange_info",
+                 ttl: float = None, fetch=None):
+        """
+        ExchangeInfo constructor.
+
+        Parameters
+        ----------
+        market: str
+            'spot' or 'futures'.
+        root: str
+            The directory of the cache on disk (None to keep it only in memory).
+        ttl: float
+            The seconds after which the information is fetched again (default one hour).
+        fetch: callable
+            A function that returns the payload of the exchange information
+            (default `get_exchange_info`/`futures_exchange_info` of a new Client).
+        """
+        if market not in self.markets:
+            raise ValueError(f"The market must be one of {self.markets}.")
+        self.market = market
+        self.root = root
+        self.ttl = self.ttl if ttl is None else ttl
+        self._fetch = fetch
+
+    @property
+    def path(self) -> str:
+        return None if self.root is None else os.path.join(self.root, f"{self.market}.json")
+
+    def _fetch_symbols(self) -> dict:
+        if self._fetch is None:
+            from binance import Client
+            client = Client()
+            payload = client.get_exchange_info() if self.market == "spot" else client.futures_exchange_info()
+        else:
+            payload = self._fetch()
+        return {item["symbol"]: item for item in payload["symbols"]}
+
+    def _read(self) -> tuple:
+        """Return (fetched time, symbols) of the cache on disk (None if it doesn't exist)."""
+        path = self.path
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path) as file:
+            cached = json.load(file)
+        return cached["time"], cached["symbols"]
+
+    def _write(self, fetched: float, symbols: dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}"
+        with open(tmp_path, "w") as file:
+            json.dump({"time": fetched, "symbols": symbols}, file)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def symbols(self) -> dict:
+        """The information of the symbols {symbol: info} (fetched if the cache is expired)."""
+        key = (self.market, self.root)
+        with self._lock:
+            now = time.time()
+            cached = self._memory.get(key)
+            if cached is None or now - cached[0] > self.ttl:
+                cached = self._read()
+                if cached is None or now - cached[0] > self.ttl:
+                    cached = (now, self._fetch_symbols())
+                    if self.path is not None:
+                        self._write(*cached)
+                self._memory[key] = cached
+            return cached[1]
+
+    def refresh(self) -> None:
+        """Expire the cache (in memory and on disk), the next request fetches the information."""
+        with self._lock:
+            self._memory.pop((self.market, self.root), None)
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def symbol(self, symbol: str) -> dict:
+        """Return the information of the symbol (ValueError if the exchange doesn't have it)."""
+        try:
+            return self.symbols[symbol]
+        except KeyError:
+            raise ValueError(f"The pair {symbol} is not supported.")
+
+    def filters(self, symbol: str) -> dict:
+        """
+        Return the trading filters of the symbol.
+
+        Returns
+        -------
+        dict
+            tick_size, min_price, step_size, min_qty, market_step_size, market_min_qty
+            and min_notional (None if the symbol doesn't have the filter).
+        """
+        filters = {item["filterType"]: item for item in self.symbol(symbol)["filters"]}
+
+        def value(filter_type, *keys):
+            item = filters.get(filter_type, {})
+            return next((float(item[key]) for key in keys if key in item), None)
+
+        return {
+            "tick_size": value("PRICE_FILTER", "tickSize"),
+            "min_price": value("PRICE_FILTER", "minPrice"),
+            "step_size": value("LOT_SIZE", "stepSize"),
+            "min_qty": value("LOT_SIZE", "minQty"),
+            "market_step_size": value("MARKET_LOT_SIZE", "stepSize"),
+            "market_min_qty": value("MARKET_LOT_SIZE", "minQty"),
+            # minNotional on spot (NOTIONAL on the newer symbols), notional on futures
+            "min_notional": value("MIN_NOTIONAL", "minNotional", "notional")
+                            or value("NOTIONAL", "minNotional"),
+        }
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+
+class GapIndex:
+    """
+    GapIndex constructor.
+
+    Description:
+        Find the missing candles of the data in one vectorized pass over the deltas of the dates.
+        The interval is the modal delta (the most frequent one), so a few gaps or
+        irregular candles at the start do not change it.
+        A gap is a delta larger than the interval, it is described by the date of
+        the candle before it (start), the date of the candle after it (end)
+        and the number of missing candles.
+    """
+    columns = ['start', 'end', 'missing']
+
+    @staticmethod
+    def interval_ms(dates: np.ndarray) -> float:
+        """Return the modal delta of the dates (milliseconds)."""
+        deltas = np.diff(np.asarray(dates, dtype=np.float64))
+        deltas = deltas[deltas > 0]
+        if deltas.size == 0:
+            raise ValueError("The interval can't be inferred from less than two candles.")
+        values, counts = np.unique(deltas, return_counts=True)
+        return float(values[np.argmax(counts)])
+
+    @classmethod
+    def build(cls, dates: np.ndarray, interval_ms: float = None) -> pd.DataFrame:
+        """
+        Build the gap index.
+
+        Parameters
+        ----------
+        dates: np.ndarray
+            The sorted dates of the candles (milliseconds).
+        interval_ms: float
+            The interval (default the modal delta).
+
+        Returns
+        -------
+        DataFrame
+            The gaps with the columns ['start', 'end', 'missing'] (empty if the candles are continuous).
+        """
+        dates = np.asarray(dates, dtype=np.float64)
+        if interval_ms is None:
+            interval_ms = cls.interval_ms(dates)
+        deltas = np.diff(dates)
+        if (deltas <= 0).any():
+            raise ValueError("The dates are not sorted or have duplicates.")
+        positions = np.flatnonzero(deltas > interval_ms)
+        return pd.DataFrame({
+            'start': dates[positions],
+            'end': dates[positions + 1],
+            'missing': (np.round(deltas[positions] / interval_ms) - 1).astype(np.int64),
+        }, columns=cls.columns)
+
+    @staticmethod
+    def fill(data: pd.DataFrame, interval_ms: float) -> pd.DataFrame:
+        """
+        Fill the gaps with flat candles.
+
+        Description:
+            A missing candle opens, closes, and has its high and low at the close of
+            the previous candle, and its volume (and the other columns of the klines) is 0.
+
+        Parameters
+        ----------
+        data: DataFrame
+            The candles with the columns ['date', 'open', 'high', 'low', 'close', 'volume', 'close_time'].
+        interval_ms: float
+            The interval of the candles.
+
+        Returns
+        -------
+        DataFrame
+            The continuous candles (with a new RangeIndex).
+        """
+        dates = data["date"].to_numpy(dtype=np.float64)
+        positions = np.round((dates - dates[0]) / interval_ms).astype(np.int64)
+        size = int(positions[-1]) + 1
+        if size == len(dates):
+            return data
+        # The last real candle at or before each candle of the grid
+        present = np.zeros(size, dtype=bool)
+        present[positions] = True
+        source = np.cumsum(present) - 1
+        close = data["close"].to_numpy()[source]
+        filled = {}
+        for column in data.columns:
+            values = data[column].to_numpy()
+            if column == "date":
+                values = dates[0] + np.arange(size) * interval_ms
+            elif column == "close_time":
+                values = dates[0] + np.arange(size) * interval_ms + interval_ms - 1
+            elif column in ("open", "high", "low", "close"):
+                values = np.where(present, values[source], close)
+            elif np.issubdtype(values.dtype, np.number):
+                values = np.where(present, values[source], 0)
+            else:
+                values = values[source]
+            filled[column] = values
+        return pd.DataFrame(filled, columns=data.columns)
@@ -0,0 +1,128 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from binance.helpers import date_to_milliseconds
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .resampler import Resampler
+
+
+class KlineDownloader:
+    """
+    KlineDownloader constructor.
+
+    Description:
+        Download historical klines page by page in parallel.
+        The range of time is split into pages of `limit` candles, the pages are fetched
+        by at most `max_workers` threads over one pooled HTTP session (keep-alive connections,
+        retries with backoff on 429/5xx) and reassembled in order without duplicates.
+        The result is the same list of klines as `Client.get_historical_klines`.
+
+    Attributes:
+        url: str
+            The klines endpoint (e.g. a local stub server in tests).
+        max_workers: int
+            The maximum number of concurrent requests.
+        limit: int
+            The number of candles of a page (1000 is the maximum of Binance).
+    """
+    url = "https://api.binance.com/api/v3/klines"
+    limit = 1000
+
+    def __init__(self, url: str = None, max_workers: int = 8, limit: int = None,
+                 retries: int = 5, timeout: float = 10, session: requests.Session = None):
+        if max_workers < 1:
+            raise ValueError("The max_workers must be a positive integer.")
+        self.url = url or self.url
+        self.max_workers = max_workers
+        self.limit = limit or self.limit
+        self.timeout = timeout
+        self.session = session or self._session(max_workers, retries)
+
+    @staticmethod
+    def _session(max_workers: int, retries: int) -> requests.Session:
+        """Create a session with a pool of max_workers connections and retries."""
+        retry = Retry(total=retries,
+                      backoff_factor=0.5,
+                      status_forcelist=(418, 429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET"]),
+                      respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @staticmethod
+    def _milliseconds(date) -> int:
+        """Convert a date (milliseconds or a string like '6 months ago UTC') to milliseconds."""
+        if date is None:
+            return int(time.time() * 1000)
+        if isinstance(date, str):
+            return date_to_milliseconds(date)
+        return int(date)
+
+    def pages(self, interval: str, start: int, end: int) -> list:
+        """
+        Split the range of time into pages.
+
+        Returns
+        -------
+        list
+            The pages [(start, end), ...] in milliseconds, each one with at most `limit` candles.
+        """
+        step = Resampler.interval_ms(interval) * self.limit
+        return [(page, min(page + step - 1, end)) for page in range(int(start), int(end) + 1, step)]
+
+    def _page(self, symbol: str, interval: str, page: tuple) -> list:
+        response = self.session.get(self.url,
+                                    params={
+                                        "symbol": symbol,
+                                        "interval": interval,
+                                        "startTime": page[0],
+                                        "endTime": page[1],
+                                        "limit": self.limit,
+                                    },
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def klines(self, symbol: str, interval: str, start, end=None) -> list:
+        """
+        Download the klines of the range of time.
+
+        Parameters
+        ----------
+        symbol: str
+            The symbol (e.g. BTCUSDT).
+        interval: str
+            The interval (e.g. 1m).
+        start: int or str
+            The start in milliseconds (or a date string like '6 months ago UTC').
+        end: int or str
+            The end in milliseconds (default now).
+
+        Returns
+        -------
+        list
+            The klines sorted by open time without duplicates.
+        """
+        pages = self.pages(interval, self._milliseconds(start), self._milliseconds(end))
+        if len(pages) == 1 or self.max_workers == 1:
+            results = [self._page(symbol, interval, page) for page in pages]
+        else:
+            with ThreadPoolExecutor(min(self.max_workers, len(pages))) as executor:
+                # map keeps the order of the pages
+                results = list(executor.map(lambda page: self._page(symbol, interval, page), pages))
+        klines = [kline for result in results for kline in result]
+        if not klines:
+            return klines
+        open_times = np.array([kline[0] for kline in klines], dtype=np.int64)
+        _, first = np.unique(open_times, return_index=True)
+        return [klines[position] for position in first]
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,168 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class Resampler:
+    """
+    Resampler constructor.
+
+    Description:
+        Resample candles to a higher interval with vectorized reductions
+        (`np.maximum.reduceat`, `np.minimum.reduceat`, `np.add.reduceat`)
+        and map the higher interval back to the candles without lookahead.
+        The candles are grouped by `(date - offset) // interval`, so the higher
+        candles are aligned like Binance (UTC midnight for days, Monday for weeks).
+    """
+    units = {
+        'm': 60 * 1000,
+        'h': 60 * 60 * 1000,
+        'd': 24 * 60 * 60 * 1000,
+        'w': 7 * 24 * 60 * 60 * 1000,
+    }
+    # 1970-01-01 is Thursday, the weeks of Binance start on Monday
+    offsets = {'w': 4 * 24 * 60 * 60 * 1000}
+    # Columns of the klines that are summed when they are in the candles
+    sums = ['qav', 'num_trades', 'taker_base_vol', 'taker_quote_vol']
+
+    @classmethod
+    def _parse(cls, interval: str) -> tuple:
+        match = re.fullmatch(r"([0-9]+)([mhdw])", str(interval))
+        if match is None or int(match.group(1)) < 1:
+            raise ValueError(f"The interval {interval} is not valid.")
+        return int(match.group(1)), match.group(2)
+
+    @classmethod
+    def interval_ms(cls, interval: str) -> int:
+        """Return the length of the interval in milliseconds."""
+        num, unit = cls._parse(interval)
+        return num * cls.units[unit]
+
+    @classmethod
+    def offset_ms(cls, interval: str) -> int:
+        """Return the offset of the first candle of the interval from the epoch."""
+        _, unit = cls._parse(interval)
+        return cls.offsets.get(unit, 0)
+
+    @classmethod
+    def buckets(cls, dates: np.ndarray, interval: str) -> np.ndarray:
+        """Return the number of the higher candle of each date."""
+        dates = np.asarray(dates).astype(np.int64)
+        return (dates - cls.offset_ms(interval)) // cls.interval_ms(interval)
+
+    @staticmethod
+    def _starts(buckets: np.ndarray) -> np.ndarray:
+        """Return the positions of the first candle of each higher candle."""
+        if len(buckets) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+    @classmethod
+    def name(cls, interval_ms: int) -> str:
+        """Return the name of an interval in milliseconds (the largest unit that divides it, e.g. 7200000 -> 2h)."""
+        for unit in ('w', 'd', 'h', 'm'):
+            if interval_ms > 0 and interval_ms % cls.units[unit] == 0:
+                return f"{interval_ms // cls.units[unit]}{unit}"
+        raise ValueError(f"The interval of {interval_ms} milliseconds is not valid.")
+
+    @classmethod
+    def resample(cls, data: pd.DataFrame, interval: str) -> pd.DataFrame:
+        """
+        Resample the candles to the interval.
+
+        Parameters
+        ----------
+        data: DataFrame
+            The candles with the columns ['date', 'open', 'high', 'low', 'close', 'volume'].
+            The dates must be sorted.
+        interval: str
+            The higher interval (e.g. '4h', '2d', '7m').
+
+        Returns
+        -------
+        DataFrame
+            The resampled candles with the columns
+            ['date', 'open', 'high', 'low', 'close', 'volume', 'close_time']
+            (and the sums of qav, num_trades, taker_base_vol and taker_quote_vol if they are in the candles).
+        """
+        buckets = cls.buckets(data["date"].to_numpy(), interval)
+        starts = cls._starts(buckets)
+        ends = np.r_[starts[1:], len(buckets)] - 1
+        date = buckets[starts] * cls.interval_ms(interval) + cls.offset_ms(interval)
+        resampled = pd.DataFrame({
+            'date': date.astype(data["date"].dtype),
+            'open': data["open"].to_numpy()[starts],
+            'high': np.maximum.reduceat(data["high"].to_numpy(), starts),
+            'low': np.minimum.reduceat(data["low"].to_numpy(), starts),
+            'close': data["close"].to_numpy()[ends],
+            'volume': np.add.reduceat(data["volume"].to_numpy(), starts),
+            'close_time': (date + cls.interval_ms(interval) - 1).astype(
+                data["date"].dtype),
+        })
+        for column in cls.sums:
+            if column in data.columns:
+                resampled[column] = np.add.reduceat(data[column].to_numpy(), starts)
+        resampled.index = resampled.date
+        return resampled
+
+    @staticmethod
+    def closed(resampled: pd.DataFrame, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Drop the last resampled candle if it is not closed.
+
+        Description:
+            The last resampled candle is built from a part of its candles
+            when its close_time is after the close_time of the last candle
+            (the candles in progress or the end of the range are inside it).
+        """
+        if resampled.empty or resampled["close_time"].iat[-1] <= data["close_time"].iat[-1]:
+            return resampled
+        return resampled.iloc[:-1]
+
+    @classmethod
+    def align(cls, data: pd.DataFrame, interval: str) -> np.ndarray:
+        """
+        Map each candle to the last closed higher candle.
+
+        Description:
+            A higher candle is closed at a candle when the close_time of the candle
+            reaches the end of the higher candle, so a candle never sees
+            the higher candle that it belongs to before the higher candle is closed.
+
+        Returns
+        -------
+        np.ndarray
+            The position of the last closed higher candle for each candle (-1 if none).
+        """
+        buckets = cls.buckets(data["date"].to_numpy(), interval)
+        starts = np.zeros(len(buckets), dtype=np.int64)
+        starts[cls._starts(buckets)] = 1
+        group = np.cumsum(starts) - 1
+        end = (buckets + 1) * cls.interval_ms(interval) + cls.offset_ms(interval)
+        closed = data["close_time"].to_numpy().astype(np.int64) + 1 >= end
+        return group - (~closed)
+
+    @staticmethod
+    def expand(result: pd.Series or pd.DataFrame, index_map: np.ndarray,
+               index: pd.Index) -> pd.Series or pd.DataFrame:
+        """
+        Expand the result of the higher interval to the candles.
+
+        Parameters
+        ----------
+        result: pd.Series or pd.DataFrame
+            The result on the higher candles.
+        index_map: np.ndarray
+            The output of `align`.
+        index: pd.Index
+            The index of the candles.
+        """
+        values = result.to_numpy()
+        if values.dtype.kind in "biu":
+            values = values.astype(np.float64)
+        expanded = values[index_map]
+        expanded[index_map < 0] = np.nan
+        if isinstance(result, pd.DataFrame):
+            return pd.DataFrame(expanded, index=index, columns=result.columns)
+        return pd.Series(expanded, index=index, name=result.name)
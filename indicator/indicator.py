@@ -3,6 +3,7 @@ import pandas as pd
 import os
 import sys
 from IPython import get_ipython
+from strategy_tester.store import ColumnStore
 
 class Indicator:
     """ Indicator class.
@@ -10,16 +11,44 @@ class Indicator:
     Description:
         This class is used to create an indicator for use in class IndicatorsParallel.
     """
-    def __init__(self, name:str, func:callable, args=None, wait=True, user=False, kwargs=None):
-        """ Initialize the indicator """
+    def __init__(self, name:str, func:callable, args=None, wait=True, user=False, kwargs=None, lookback:int=None, timeframe:str=None):
+        """ Initialize the indicator
+        
+        Parameters
+        ----------
+        lookback: int
+            The number of candles that the indicator needs before a value (warm-up length).
+            If it is set, the indicator can be recomputed only on the tail of the data (see `tail`).
+        timeframe: str
+            The higher interval that the indicator is computed on (e.g. '4h').
+            The candle columns in the args and kwargs (open, high, low, close, volume)
+            are replaced by the resampled candles and the result is mapped back
+            to the candles of the strategy without lookahead.
+            Other Series or DataFrames of the length of the candles (e.g. the result
+            of another indicator) raise a ValueError.
+        """
         self.name = name
         self.func = func
         self.wait = wait
         self.user = user
         self.parameters = None
+        self.dtype_policy = None
+        self.cache_status = None
+        # Backend of the cache: 'pickle' or 'memmap' (see strategy_tester.store.ColumnStore)
+        self.cache_backend = "pickle"
         self.args = self._validate(args)
         self.kwargs = self._validate(kwargs)
+        self.lookback = self._validate_lookback(lookback)
+        self.timeframe = timeframe
         
+    @staticmethod
+    def _validate_lookback(lookback:int) -> int:
+        if lookback is None:
+            return None
+        if not isinstance(lookback, int) or lookback < 0:
+            raise ValueError("The lookback must be a non-negative integer.")
+        return lookback
+
     @staticmethod
     def _validate(ins:list or dict) -> list or dict:
         if ins is None:
@@ -43,7 +72,10 @@ class Indicator:
         hash_key = self._convert_hash(self.parameters, *self.args, **self.kwargs)
         name = f"{self.name}_{self.func.__name__}_{hash_key}"
         result = self._func()
-        result.to_pickle('./cache/{}.pickle'.format(name))
+        if self.cache_backend == "memmap":
+            ColumnStore.write('./cache/{}'.format(name), result)
+        else:
+            result.to_pickle('./cache/{}.pickle'.format(name))
         return result
         
     def _get_cache(self):
@@ -61,6 +93,11 @@ class Indicator:
         """ 
         hash_key = self._convert_hash(self.parameters, *self.args, **self.kwargs)
         name = f"{self.name}_{self.func.__name__}_{hash_key}"
+        if self.cache_backend == "memmap":
+            path_cache = './cache/{}'.format(name)
+            if ColumnStore.exists(path_cache):
+                return True, ColumnStore.read(path_cache)
+            return False, None
         path_cache = './cache/{}.pickle'.format(name)
         if os.path.exists(path_cache):
             result = pd.read_pickle(path_cache)
@@ -93,6 +130,63 @@ class Indicator:
             else:
                 os._exit(0)
         
+    def _index(self) -> pd.Index:
+        """Return the index of the first series or dataframe in the args and kwargs."""
+        for arg in list(self.args) + list(self.kwargs.values()):
+            if isinstance(arg, (pd.Series, pd.DataFrame)):
+                return arg.index
+        return None
+
+    @staticmethod
+    def _slice(arg, window:int):
+        if isinstance(arg, (pd.Series, pd.DataFrame)):
+            return arg.iloc[-window:]
+        return arg
+
+    def tail(self, size:int, previous:pd.Series or pd.DataFrame=None):
+        """
+        Recompute the last `size` values of the indicator.
+        
+        Description:
+            The indicator is computed only on the last `lookback + size` candles
+            of its args and the last `size` values are spliced into the previous result
+            (reindexed to the current candles).
+            If the lookback is not declared, there is no previous result or
+            the previous result does not cover the candles before the tail,
+            the indicator is computed on the whole data.
+        
+        Parameters
+        ----------
+        size: int
+            The number of the last values that must be recomputed.
+        previous: pd.Series or pd.DataFrame
+            The result of the previous run.
+        
+        Returns:
+            result: pd.Series or pd.DataFrame
+        """
+        index = self._index()
+        if self.lookback is None or previous is None or index is None:
+            return self()
+        window = self.lookback + size
+        if len(index) <= window or not index[:-size].isin(previous.index).all():
+            return self()
+
+        args, kwargs = self.args, self.kwargs
+        self.args = [self._slice(arg, window) for arg in args]
+        self.kwargs = {key: self._slice(value, window) for key, value in kwargs.items()}
+        try:
+            result = self._func()
+        finally:
+            self.args, self.kwargs = args, kwargs
+        self.cache_status = "tail"
+
+        spliced = previous.reindex(index)
+        spliced.iloc[-size:] = result.iloc[-size:].to_numpy()
+        if self.dtype_policy is not None:
+            spliced = self.dtype_policy.cast_indicator(spliced)
+        return spliced
+
     def __repr__(self) -> str:
         return self.name
     
@@ -101,9 +195,13 @@ class Indicator:
 
     def __call__(self):
         if self.user:
-            return self._func()
+            self.cache_status = "disabled"
+            result = self._func()
         else:
             exist, result = self._get_cache()
+            self.cache_status = "hit" if exist else "miss"
             if not exist:
                 result = self._set_cache()
-            return result
\ No newline at end of file
+        if self.dtype_policy is not None:
+            result = self.dtype_policy.cast_indicator(result)
+        return result
\ No newline at end of file
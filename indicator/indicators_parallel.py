@@ -1,6 +1,16 @@
 from multiprocessing import Process, Manager
 from .indicator import Indicator
+from strategy_tester.dtypes import DtypePolicy
+from strategy_tester.handler.resampler import Resampler
+from strategy_tester.store import ColumnStore
+import hashlib
+import logging
 import os
+import time
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 class IndicatorsParallel:
     """
@@ -12,12 +22,57 @@ class IndicatorsParallel:
     """
     manager = Manager()
     _user = False
+    _dtype_policy = DtypePolicy()
+    # Log the profile of each indicator after it is set
+    profile_log = False
+    # Backend of the indicators cache: 'pickle' or 'memmap'
+    cache_backend = "pickle"
+    # Number of the last values recomputed for indicators with a lookback (None is disabled)
+    _tail = None
+
+    @property
+    def tail_size(self) -> int:
+        return self._tail
+
+    @tail_size.setter
+    def tail_size(self, size:int):
+        """
+        Enable the tail mode.
+        
+        Description
+        -----------
+        In tail mode, the indicators with a declared lookback are computed
+        only on the last `lookback + size` candles and spliced into
+        the results of the previous run, so the work of each run is
+        bounded by the lookback instead of the length of the data.
+        """
+        if size is not None and (not isinstance(size, int) or size < 1):
+            raise ValueError("The tail size must be a positive integer.")
+        self._tail = size
+
+    @property
+    def dtype_policy(self) -> DtypePolicy:
+        return self._dtype_policy
+
+    @dtype_policy.setter
+    def dtype_policy(self, policy):
+        """
+        Set the dtype policy of the indicators and the conditions.
+
+        Parameters
+        ----------
+        policy: DtypePolicy or str
+            The policy, 'float64' (default) or 'compact'.
+        """
+        self._dtype_policy = DtypePolicy.from_value(policy)
     
     def _init_indicator(self):
         self.processes = {}
         self.list_of_indicators = []
         self.results = {}
         self.returns = self.manager.dict()
+        self.profiles = self.manager.dict()
+        self._profile = {}
         
     def add(self, *indicators):
         """
@@ -28,6 +83,8 @@ class IndicatorsParallel:
                 indicator.user = True
         for indicator in indicators:
             indicator.parameters = self.__dict__.get("parameters", None)
+            indicator.dtype_policy = self.dtype_policy
+            indicator.cache_backend = self.cache_backend
         self.list_of_indicators.extend(indicators)
        
     def _wrapper(self, indicator:Indicator):
@@ -41,6 +98,7 @@ class IndicatorsParallel:
         queue : multiprocessing.Queue
             Queue to send results to.
         """
+        start_wait = time.perf_counter()
         indicator.args = list(indicator.args)
         for index, arg in enumerate(indicator.args):
             if isinstance(arg, Indicator):
@@ -51,7 +109,81 @@ class IndicatorsParallel:
                     if type(indicator_arg) != bool:
                         break
                 indicator.args[index] = indicator_arg
-        self.returns[indicator.name] = indicator()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        if indicator.timeframe:
+            result = self._timeframe_call(indicator)
+        elif self._tail and indicator.lookback is not None:
+            previous = self.__dict__.get("_tail_results", {}).get(indicator.name)
+            result = indicator.tail(self._tail, previous)
+        else:
+            result = indicator()
+        end_cpu = time.process_time()
+        end_wall = time.perf_counter()
+        self.returns[indicator.name] = result
+        self.profiles[indicator.name] = {
+            "wait_time": start_wall - start_wait,
+            "wall_time": end_wall - start_wall,
+            "cpu_time": end_cpu - start_cpu,
+            "send_time": time.perf_counter() - end_wall,
+            "output_bytes": self._nbytes(result),
+            "cache": indicator.cache_status,
+        }
+
+    def _timeframe(self, timeframe:str) -> tuple:
+        """
+        Return the resampled candles of the timeframe and their index map.
+        
+        Description
+        -----------
+        The resampled candles are cached in memory and in './cache/' (ColumnStore)
+        per timeframe, symbol, range and fingerprint of the data (a hash of the close),
+        the index map is the position of the last closed resampled candle for each candle
+        (see Resampler.align).
+        """
+        data = self.data
+        fingerprint = hashlib.blake2b(
+            np.ascontiguousarray(data.close.to_numpy()).tobytes(), digest_size=8).hexdigest()
+        key = (timeframe, getattr(self, "symbol", None) or "data",
+               data.date.iloc[0], data.date.iloc[-1], len(data), fingerprint)
+        timeframes = self.__dict__.setdefault("_timeframes", {})
+        if key not in timeframes:
+            path_cache = './cache/timeframe_{}_{}_{}_{}_{}_{}'.format(*key)
+            if ColumnStore.exists(path_cache):
+                bars = ColumnStore.read(path_cache)
+            else:
+                bars = Resampler.resample(data, timeframe)
+                ColumnStore.write(path_cache, bars)
+            timeframes[key] = (bars, Resampler.align(data, timeframe))
+        return timeframes[key]
+
+    def _timeframe_call(self, indicator:Indicator):
+        """
+        Compute the indicator on its timeframe and map it back to the candles.
+        """
+        bars, index_map = self._timeframe(indicator.timeframe)
+
+        def replace(arg):
+            # Replace the candle columns with the resampled candles
+            if isinstance(arg, (pd.Series, pd.DataFrame)) and len(arg) == len(self.data):
+                if isinstance(arg, pd.Series) and arg.name in bars.columns:
+                    return bars[arg.name]
+                raise ValueError(
+                    f"The indicator {indicator.name} has the timeframe {indicator.timeframe}, "
+                    "its arguments can only be the candle columns (open, high, low, close, volume, ...).")
+            return arg
+
+        indicator.args = [replace(arg) for arg in indicator.args]
+        indicator.kwargs = {key: replace(value) for key, value in indicator.kwargs.items()}
+        result = indicator()
+        return Resampler.expand(result, index_map, self.data.index)
+
+    @staticmethod
+    def _nbytes(result) -> int:
+        """Return the bytes held by the result of an indicator."""
+        if isinstance(result, (pd.Series, pd.DataFrame)):
+            return int(pd.Series(result.memory_usage(deep=True)).sum())
+        return 0
 
     def _live(self, name:str):
         """
@@ -83,6 +215,10 @@ class IndicatorsParallel:
         """
         Run indicators in parallel.
         """
+        # Resample the candles once before forking the processes
+        for timeframe in {indicator.timeframe for indicator in self.list_of_indicators}:
+            if timeframe:
+                self._timeframe(timeframe)
         for indicator in self.list_of_indicators:
             p = Process(target=self._wrapper, args=(indicator,))
             p.start()
@@ -105,7 +241,15 @@ class IndicatorsParallel:
         for process in self.processes:
             if self.processes[process].is_alive():
                 self.processes[process].join()
+            start_receive = time.perf_counter()
             self.__dict__[process] = self.returns[process]
+            if self._tail:
+                self.__dict__.setdefault("_tail_results", {})[process] = self.__dict__[process]
+            profile = dict(self.profiles.get(process, {}))
+            profile["receive_time"] = time.perf_counter() - start_receive
+            self._profile[process] = profile
+            if self.profile_log:
+                logger.info("indicator %s: %s", process, profile)
          
     def start(self):
         """
@@ -114,11 +258,35 @@ class IndicatorsParallel:
         if self.list_of_indicators:
             self._start()
             
+    def indicator_profile(self) -> pd.DataFrame:
+        """
+        Return the profile of the indicators of the last run.
+
+        Description
+        -----------
+        Each row is an indicator with the columns:
+            wait_time: seconds waiting for the indicators used as arguments
+            wall_time: seconds of the computation (or loading the cache)
+            cpu_time: CPU seconds of the computation in the worker process
+            send_time: seconds to pickle and send the result to the manager
+            receive_time: seconds to receive and unpickle the result
+            output_bytes: bytes held by the result
+            cache: 'hit', 'miss', 'tail' or 'disabled' (user mode)
+        """
+        return pd.DataFrame.from_dict(self.__dict__.get("_profile", {}),
+                                      orient="index")
+
     def get_indicator(self, name:str):
         """
         Return indicator by name.
         """
         return self.__dict__.get(name)
+
+    def indicator_results(self) -> dict:
+        """
+        Return the results of the indicators of the last run {name: result}.
+        """
+        return {name: self.get_indicator(name) for name in self.__dict__.get("processes", {})}
     
     def __format__(self, __format_spec: str) -> list:
         """ Filter indicators by format spec. """
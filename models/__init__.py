@@ -1,2 +1,3 @@
 from .candle import Candle
-from .trade import Trade, Order, OrderToTrade
\ No newline at end of file
+from .trade import Trade, Order, OrderToTrade
+from .trade_log import TradeLog, TradeView
@@ -0,0 +1,220 @@
+import sys
+from dataclasses import fields as dataclass_fields
+
+import numpy as np
+import pandas as pd
+
+from .trade import Trade
+
+FIELDS = tuple(field.name for field in dataclass_fields(Trade))
+CATEGORICAL_FIELDS = ("type", "order_type", "entry_signal", "exit_signal", "comment")
+
+
+class TradeView:
+    """
+    TradeView class.
+
+    Description:
+        A Trade-like view of one row of a TradeLog.
+        Reading or setting an attribute reads or writes the arrays of the log.
+    """
+    __slots__ = ("_log", "_row")
+
+    def __init__(self, log: "TradeLog", row: int):
+        object.__setattr__(self, "_log", log)
+        object.__setattr__(self, "_row", row)
+
+    def __getattr__(self, name):
+        if name not in self._log.fields:
+            raise AttributeError(name)
+        return self._log.get(self._row, name)
+
+    def __setattr__(self, name, value):
+        if name not in self._log.fields:
+            raise AttributeError(name)
+        self._log.set(self._row, name, value)
+
+    def to_trade(self) -> Trade:
+        """Return a copy of the row as a Trade."""
+        return Trade(**{name: self._log.get(self._row, name) for name in self._log.fields})
+
+    def __repr__(self) -> str:
+        return repr(self.to_trade())
+
+
+class TradeLog:
+    """
+    TradeLog class.
+
+    Description:
+        A columnar (struct of arrays) log of trades backed by growable numpy arrays.
+        The numeric fields of Trade are stored in one float64 block (None is NaN) and
+        the string fields (type, order_type, signals, comment) as categorical codes.
+        `to_frame()` builds a DataFrame with the dtypes of a DataFrame of Trades
+        and iterating yields TradeView objects that behave like Trade.
+    """
+    fields = FIELDS
+    categorical_fields = CATEGORICAL_FIELDS
+    float_fields = tuple(name for name in FIELDS if name not in CATEGORICAL_FIELDS)
+    int_fields = ("orderid", "bars_traded")
+
+    def __init__(self, trades: list = None, capacity: int = 64):
+        self._size = 0
+        self._floats = np.full((len(self.float_fields), capacity), np.nan)
+        self._codes = np.full((len(self.categorical_fields), capacity), -1, dtype=np.int32)
+        self._categories = {name: [] for name in self.categorical_fields}
+        self._lookup = {name: {} for name in self.categorical_fields}
+        self._float_position = {name: index for index, name in enumerate(self.float_fields)}
+        self._code_position = {name: index for index, name in enumerate(self.categorical_fields)}
+        for trade in trades or []:
+            self.append(trade)
+
+    def _grow(self):
+        """Double the capacity of the arrays."""
+        capacity = self._floats.shape[1] * 2
+        floats = np.full((len(self.float_fields), capacity), np.nan)
+        floats[:, :self._size] = self._floats[:, :self._size]
+        codes = np.full((len(self.categorical_fields), capacity), -1, dtype=np.int32)
+        codes[:, :self._size] = self._codes[:, :self._size]
+        self._floats, self._codes = floats, codes
+
+    def _code(self, name: str, value) -> int:
+        """Return the categorical code of the value (-1 for None)."""
+        if value is None:
+            return -1
+        lookup = self._lookup[name]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self._categories[name])
+            self._categories[name].append(value)
+        return code
+
+    def append(self, trade: Trade or TradeView):
+        """Append a copy of the trade to the log."""
+        if self._size == self._floats.shape[1]:
+            self._grow()
+        row = self._size
+        self._size += 1
+        for name in self.fields:
+            self.set(row, name, getattr(trade, name))
+
+    def copy(self) -> "TradeLog":
+        """Return a copy of the log (the arrays are copied, not the trades one by one)."""
+        log = TradeLog(capacity=self._floats.shape[1])
+        log._size = self._size
+        log._floats = self._floats.copy()
+        log._codes = self._codes.copy()
+        log._categories = {name: list(values) for name, values in self._categories.items()}
+        log._lookup = {name: dict(values) for name, values in self._lookup.items()}
+        return log
+
+    def get(self, row: int, name: str):
+        """Return the value of a field of a row."""
+        if name in self._code_position:
+            code = self._codes[self._code_position[name], row]
+            return self._categories[name][code] if code >= 0 else None
+        value = self._floats[self._float_position[name], row]
+        if np.isnan(value):
+            return None
+        return int(value) if name in self.int_fields else float(value)
+
+    def set(self, row: int, name: str, value):
+        """Set the value of a field of a row."""
+        if name in self._code_position:
+            self._codes[self._code_position[name], row] = self._code(name, value)
+        else:
+            self._floats[self._float_position[name], row] = np.nan if value is None else value
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a field of all rows (a view for the numeric fields)."""
+        if name in self._code_position:
+            return self._strings(name)
+        return self._floats[self._float_position[name], :self._size]
+
+    def _strings(self, name: str) -> np.ndarray:
+        """Return a string field of all rows as an object array (None for the missing values)."""
+        categories = np.array(self._categories[name] + [None], dtype=object)
+        # The code -1 (None) takes the last item
+        return categories[self._codes[self._code_position[name], :self._size]]
+
+    def _numbers(self, name: str) -> np.ndarray:
+        """Return a numeric field like pandas infers it from the Trades (None if it is never set, int64 for the integer fields)."""
+        values = self._floats[self._float_position[name], :self._size]
+        missing = np.isnan(values)
+        if values.size and missing.all():
+            return np.full(values.size, None, dtype=object)
+        if name in self.int_fields and not missing.any():
+            return values.astype(np.int64)
+        return values
+
+    def to_frame(self, categorical: bool = False) -> pd.DataFrame:
+        """
+        Convert the log to a DataFrame.
+
+        Description:
+            The columns have the dtypes of a DataFrame of Trades (object strings,
+            int64 orderid and bars_traded when they are all set, None for a field never set).
+            The float columns are built on one block of the arrays without copying the trades.
+
+        Parameters
+        ----------
+        categorical: bool
+            If True, the string columns are categoricals on the codes (less memory, but
+            a value outside the categories can't be set).
+        """
+        frame = pd.DataFrame(self._floats[:, :self._size].T,
+                             columns=list(self.float_fields),
+                             copy=False)
+        for name in self.float_fields:
+            values = self._numbers(name)
+            if values.dtype != np.float64:
+                frame[name] = values
+        for name in self.categorical_fields:
+            if categorical:
+                values = pd.Categorical.from_codes(
+                    self._codes[self._code_position[name], :self._size],
+                    categories=pd.Index(self._categories[name], dtype=object))
+            else:
+                values = self._strings(name)
+            frame.insert(self.fields.index(name), name, values)
+        return frame
+
+    @property
+    def nbytes(self) -> int:
+        """The bytes held by the arrays of the log (with the unused capacity) and the categories."""
+        return self._floats.nbytes + self._codes.nbytes + sum(
+            sys.getsizeof(value) for values in self._categories.values() for value in values)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TradeView(self, row) for row in range(self._size)[index]]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("trade index out of range")
+        return TradeView(self, index)
+
+    def __iter__(self):
+        return (TradeView(self, row) for row in range(self._size))
+
+    def __add__(self, other: list) -> list:
+        return list(self) + list(other)
+
+    def __radd__(self, other: list) -> list:
+        return list(other) + list(self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, TradeLog)):
+            return len(self) == len(other) and all(
+                trade.to_trade() == (item.to_trade() if isinstance(item, TradeView) else item)
+                for trade, item in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TradeLog({len(self)} trades)"
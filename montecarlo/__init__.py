@@ -0,0 +1 @@
+from .monte_carlo import MonteCarlo
@@ -0,0 +1,153 @@
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+
+def _simulate(net:np.ndarray, initial_capital:float, ruin_level:float,
+              method:str, size:int, seed) -> dict:
+    """ Simulate a chunk of equity paths (module level so it can be sent to a process pool)
+
+    Args:
+        net (np.ndarray): Net profit of the closed trades in order
+        initial_capital (float): Initial capital of strategy
+        ruin_level (float): Equity at (or under) which a path is ruined
+        method (str): 'permutation' or 'bootstrap'
+        size (int): Number of simulations of the chunk
+        seed (np.random.SeedSequence): Seed of the chunk
+
+    Returns:
+        dict: Metrics of each simulation of the chunk
+    """
+    rng = np.random.default_rng(seed)
+    trades = net.size
+    # Index matrix (simulations x trades)
+    if method == "permutation":
+        indices = rng.permuted(np.broadcast_to(np.arange(trades), (size, trades)), axis=1)
+    else:
+        indices = rng.integers(0, trades, size=(size, trades))
+    equity = initial_capital + np.cumsum(net[indices], axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), initial_capital)
+    draw_down = equity - peak
+    draw_down_percent = draw_down / peak * 100
+    final = equity[:, -1]
+    return {
+        "net_profit": final - initial_capital,
+        "net_profit_percent": (final - initial_capital) * 100 / initial_capital,
+        "max_draw_down": draw_down.min(axis=1),
+        "max_draw_down_percent": draw_down_percent.min(axis=1),
+        "min_equity": np.minimum(equity.min(axis=1), initial_capital),
+        "ruin": equity.min(axis=1) <= ruin_level,
+    }
+
+
+class MonteCarlo:
+    """ Class to resample the closed trades of a backtest (Monte Carlo simulation)
+
+    Description:
+        Each simulation reorders (permutation) or resamples with replacement (bootstrap)
+        the net profit of the closed trades and rebuilds the equity path.
+        The simulations are generated as index matrices and computed with batched NumPy,
+        chunk by chunk (chunk_size simulations at a time, so the memory is bounded).
+        With processes, the chunks are spread across a process pool.
+        Each chunk has its own seed spawned from seed, so the results do not depend on processes.
+
+    Attributes:
+        backtest (Backtest): Backtest of the strategy (its closed trades are resampled)
+        simulations (int): Number of simulations
+        method (str): 'permutation' (trade-order shuffle) or 'bootstrap'
+        ruin (float): Draw down of the initial capital (percent) that counts as ruin
+        seed (int): Seed of the random generator
+        chunk_size (int): Number of simulations computed at a time
+        processes (int): Number of processes (None or 1 for the current process)
+    """
+    methods = ("permutation", "bootstrap")
+    quantiles = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+    def __init__(self, backtest, simulations:int=10000, method:str="permutation",
+                 ruin:float=50, seed:int=None, chunk_size:int=1000, processes:int=None):
+        arrays = backtest._arrays()
+        self.net = arrays["net"][arrays["exit"]]
+        self.net = self.net[~np.isnan(self.net)]
+        if self.net.size == 0:
+            raise ValueError("There are no closed trades to resample.")
+        self.initial_capital = backtest.initial_capital
+        self.simulations = self._validate_positive(simulations, "simulations")
+        self.method = self._validate_method(method)
+        if not 0 < ruin <= 100:
+            raise ValueError("The ruin must be a percent between 0 and 100.")
+        self.ruin = ruin
+        self.seed = seed
+        self.chunk_size = self._validate_positive(chunk_size, "chunk_size")
+        self.processes = processes
+        self._results = None
+
+    @staticmethod
+    def _validate_positive(value:int, name:str) -> int:
+        if not isinstance(value, (int, np.integer)) or value < 1:
+            raise ValueError(f"The {name} must be a positive integer.")
+        return int(value)
+
+    def _validate_method(self, method:str) -> str:
+        if method not in self.methods:
+            raise ValueError(f"The method must be one of {self.methods}.")
+        return method
+
+    def _tasks(self) -> list:
+        """ Arguments of _simulate for each chunk """
+        sizes = [self.chunk_size] * (self.simulations // self.chunk_size)
+        if self.simulations % self.chunk_size:
+            sizes.append(self.simulations % self.chunk_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        ruin_level = self.initial_capital * (1 - self.ruin / 100)
+        return [(self.net, self.initial_capital, ruin_level, self.method, size, seed)
+                for size, seed in zip(sizes, seeds)]
+
+    def run(self) -> pd.DataFrame:
+        """ Run the simulations
+
+        Returns:
+            pd.DataFrame: Metrics of each simulation (net_profit, net_profit_percent,
+                max_draw_down, max_draw_down_percent, min_equity, ruin)
+        """
+        tasks = self._tasks()
+        if self.processes and self.processes > 1 and len(tasks) > 1:
+            with Pool(min(self.processes, len(tasks))) as pool:
+                chunks = pool.starmap(_simulate, tasks)
+        else:
+            chunks = [_simulate(*task) for task in tasks]
+        self._results = pd.DataFrame({
+            metric: np.concatenate([chunk[metric] for chunk in chunks])
+            for metric in chunks[0]
+        })
+        return self._results
+
+    @property
+    def results(self) -> pd.DataFrame:
+        """ Metrics of each simulation (the simulations are run once) """
+        if self._results is None:
+            self.run()
+        return self._results
+
+    @property
+    def ruin_probability(self) -> float:
+        """ Probability that the equity falls to the ruin level """
+        return float(self.results["ruin"].mean())
+
+    def summary(self, quantiles:tuple=None) -> pd.DataFrame:
+        """ Quantiles of the metrics of the simulations
+
+        Args:
+            quantiles (tuple): Quantiles to calculate (default: MonteCarlo.quantiles)
+
+        Returns:
+            pd.DataFrame: The quantiles (index) of each metric (columns), the
+                ruin_probability column is the same for all quantiles.
+        """
+        quantiles = self.quantiles if quantiles is None else quantiles
+        results = self.results.drop(columns="ruin")
+        summary = pd.DataFrame(np.quantile(results.to_numpy(), quantiles, axis=0),
+                               index=pd.Index(quantiles, name="quantile"),
+                               columns=results.columns)
+        summary["ruin_probability"] = self.ruin_probability
+        return summary
@@ -1,95 +1,223 @@
+from concurrent.futures import wait
 from strategy_tester.models import Trade
 from strategy_tester.backtest import Backtest
+from strategy_tester.store import SharedFrame
 import pandas as pd
 import numpy as np
 
+
+def _periods_results(candles:dict, trades:dict, periods:list) -> dict:
+    """Calculate the backtest results of some periods in a worker (the candles and trades are read from shared memory)"""
+    results = {}
+    with SharedFrame.attach(candles) as shared_candles, SharedFrame.attach(trades) as shared_trades:
+        for label, (positions, start, end, initial_capital) in periods:
+            results[label] = PeriodicCalc._calc_backtest(shared_trades.to_frame(positions),
+                                                         shared_candles.to_frame(slice(start, end)),
+                                                         initial_capital).result()
+    return results
+
+
 class PeriodicCalc:
     """
     PeriodicCalc is created for calculating the backtest for the given period.
     
+    Description:
+        The boundaries of the periods are computed once from the dates of the candles
+        and the trades are assigned to the periods with `searchsorted` on their entry dates.
+        Each period is backtested on a slice of the candles (the candles are not copied).
+        With an executor (concurrent.futures), the periods are submitted to it and the workers read
+        the candles and trades from shared memory instead of pickled copies of the frames.
+        The results are collected on the first access of `results`, so several PeriodicCalc
+        (e.g. one per strategy) can share an executor and run at the same time.
+        The shared memory is freed when the results are collected or on `close()`
+        (PeriodicCalc is also a context manager), it is not left to the garbage collector.
+    
     Attributes:
         backtests: A dictionary of backtests for each period
         results: A dictionary of results for each period
     
     
     """
-    def __init__(self, initial_capital:float, trades:pd.DataFrame, data:pd.DataFrame, freq:str=None, start_date:str=None, end_date:str=None):
+    # Columns of the candles used by the backtest
+    candles_columns = ['open', 'high', 'low', 'close', 'volume']
+    # Number of periods sent to the executor in one task
+    periods_per_task = 32
+
+    def __init__(self, initial_capital:float, trades:pd.DataFrame, data:pd.DataFrame, freq:str=None, start_date:str=None, end_date:str=None, executor=None):
         self.initial_capital = initial_capital
         self.trades = self._valid_trades(trades)
-        self.data = self._valid_data(data)
-        self.freq = freq if freq else len(self.data)
+        self.data = data
+        self.dates = self._valid_data(data)
+        self.freq = freq
         self.start_date = start_date if start_date else None
-        self.end_date = end_date if end_date else self.data.date.max() # Get the last date
+        self.end_date = end_date if end_date else self.dates[-1] # Get the last date
+        self.executor = executor
+        self._periods = {}
         self._backtests = {}
         self._results = {}
+        self._futures = []
+        self._shared = []
         self.backtest_calc()
         
     @property
     def results(self):
-        """Get the results of the backtests"""
+        """Get the results of the backtests (wait for the executor)"""
+        if self._futures:
+            try:
+                results = {}
+                for future in self._futures:
+                    results.update(future.result())
+                self._results = {label: results[label] for label in self._periods}
+            finally:
+                # If a period failed, the others may still read the shared memory
+                self.close()
         return self._results
     
     @property
     def backtests(self):
-        """Get the backtests"""
+        """Get the backtests (the backtests of the periods computed in the executor are created on demand)"""
+        for label, (positions, start, end, initial_capital) in self._periods.items():
+            if label not in self._backtests:
+                self._backtests[label] = self._calc_backtest(self.trades.iloc[positions],
+                                                             self.data.iloc[start:end],
+                                                             initial_capital)
         return self._backtests
 
     @staticmethod
     def _valid_trades(trades:pd.DataFrame):
         """Validate the trades"""
-        if trades.empty:
-            raise ValueError("No trades found")
         if not isinstance(trades, pd.DataFrame):
             raise TypeError("The trades must be a pandas DataFrame")
-        if not isinstance(trades["entry_date"], np.datetime64):
+        if trades.empty:
+            raise ValueError("No trades found")
+        if not np.issubdtype(trades["entry_date"].dtype, np.datetime64):
             trades["entry_date"] = pd.to_datetime(trades["entry_date"], unit="ms").round("1s")
-        if not isinstance(trades["exit_date"], np.datetime64):
+        if not np.issubdtype(trades["exit_date"].dtype, np.datetime64):
             trades["exit_date"] = pd.to_datetime(trades["exit_date"], unit="ms").round("1s")
-        return trades
+        return trades.reset_index(drop=True)
  
-    
-    def _valid_data(self, data:pd.DataFrame, key:str='date'):
-        """Check if the data is valid"""
+    @staticmethod
+    def _valid_data(data:pd.DataFrame, key:str='date') -> pd.DatetimeIndex:
+        """Check if the data is valid and return the dates of the candles (the data is not changed)
+        
+        The dates are not rounded: the dates of the candles are whole seconds, and the dates of
+        the bars of BarAggregator (the entry dates of their trades) are in milliseconds.
+        """
         if data.empty:
             raise ValueError('No data available')
-        elif not isinstance(data[key], np.datetime64):
-            data[key] = pd.to_datetime(data[key], unit="ms").round("1s")
-            
-        return data
+        if np.issubdtype(data[key].dtype, np.datetime64):
+            return pd.DatetimeIndex(data[key])
+        return pd.DatetimeIndex(pd.to_datetime(data[key].to_numpy(), unit="ms"))
+
+    def _start(self) -> int:
+        """Get the position of the first candle from the start date"""
+        if not self.start_date:
+            return 0
+        return int(self.dates.searchsorted(pd.Timestamp(self.start_date)))
+
+    def _boundaries(self, start:int) -> tuple:
+        """Calculate the periods once
+        
+        Returns:
+            labels: The labels of the periods (the same as pd.Grouper)
+            ends: The position of the end (exclusive) of each period in the candles
+        """
+        dates = self.dates[start:]
+        if not self.freq:
+            return [dates[0]], np.array([len(self.dates)])
+        counts = pd.Series(np.ones(len(dates), dtype=np.int64), index=dates).resample(self.freq).sum()
+        return list(counts.index), start + np.cumsum(counts.to_numpy())
+
+    def _assign_trades(self, start:int, ends:np.ndarray) -> tuple:
+        """Assign the trades to the periods
         
+        Description:
+            The candle of a trade is the candle whose date equals the entry date of the trade,
+            the period of the candle is found with `searchsorted` on the ends of the periods.
+            Trades without a candle or before the start date are not assigned.
+        
+        Returns:
+            order: The positions of the trades sorted by period (stable)
+            bounds: The first trade (in order) of each period and the end (len(ends) + 1)
+        """
+        dates = self.dates.asi8
+        entry_dates = pd.DatetimeIndex(self.trades.entry_date).asi8
+        candle = np.searchsorted(dates, entry_dates)
+        matched = (candle < len(dates)) & (dates[np.minimum(candle, len(dates) - 1)] == entry_dates)
+        period = np.searchsorted(ends, candle, side="right")
+        period = np.where(matched & (candle >= start), period, len(ends))
+        order = np.argsort(period, kind="stable")
+        bounds = np.searchsorted(period[order], np.arange(len(ends) + 1))
+        return order, bounds
+
     def backtest_calc(self):
         """Calculate the backtest results for the given trades"""
-        
-        if self.start_date:
-            self.data = self.data[self.data.date >= self.start_date]
-
-        steps = self.data.groupby(pd.Grouper(key='date', freq=self.freq))
-        for step in steps:
-            # Get the trades for the current step
-            trades = self._get_trades(data=step[1])
-            if trades.empty:
+        start = self._start()
+        if start >= len(self.dates):
+            return
+
+        labels, ends = self._boundaries(start)
+        order, bounds = self._assign_trades(start, ends)
+        starts = np.r_[start, ends[:-1]]
+        for number, label in enumerate(labels):
+            # Get the trades for the current period
+            positions = order[bounds[number]:bounds[number + 1]]
+            if positions.size == 0:
                 continue
-            
-            index_first_trade = trades.iloc[0].name
+
+            index_first_trade = positions[0]
             if index_first_trade != 0:
-                initial_capital = self._initial_capital(self.trades.iloc[trades.iloc[0].name-1])
+                initial_capital = self._initial_capital(self.trades.iloc[index_first_trade-1])
             else:
                 initial_capital = self.initial_capital
-            trades.to_pickle("trades.pkl")
-            # Create the Backtest object
-            backtest = self._calc_backtest(trades, step[1], initial_capital)
-            
-            self._backtests[step[0]] = backtest
-            self._results[step[0]] = backtest.result
-            
-    def _grouping(self):
-        """Group the data by days"""
-        return self.data.groupby(pd.Grouper(key='date', freq=self.freq))
-    
-    def _get_trades(self, data):
-        """Get the trades for the given data"""
-        return self.trades[self.trades.entry_date.isin(data.date)]
-    
+            self._periods[label] = (positions, starts[number], ends[number], initial_capital)
+
+        if self.executor is not None and self._periods:
+            self._submit()
+            return
+        for label, backtest in self.backtests.items():
+            self._results[label] = backtest.result()
+
+    def _submit(self):
+        """Submit the periods to the executor, the candles and trades are copied once to shared memory"""
+        candles = SharedFrame(self.data[self.candles_columns])
+        self._shared.append(candles)
+        trades = SharedFrame(self.trades)
+        self._shared.append(trades)
+        periods = list(self._periods.items())
+        try:
+            for first in range(0, len(periods), self.periods_per_task):
+                self._futures.append(self.executor.submit(_periods_results,
+                                                          candles.handle, trades.handle,
+                                                          periods[first:first + self.periods_per_task]))
+        except BaseException:
+            for future in self._futures:
+                future.cancel()
+            self._futures = []
+            self._close_shared()
+            raise
+
+    def _close_shared(self):
+        for shared in self._shared:
+            shared.close()
+        self._shared = []
+
+    def close(self):
+        """Cancel the periods that have not started, wait for the others and free the shared memory"""
+        try:
+            for future in self._futures:
+                future.cancel()
+            wait(self._futures)
+        finally:
+            self._futures = []
+            self._close_shared()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
     @staticmethod
     def _initial_capital(trade):
         return trade.contract * trade.exit_price
@@ -98,5 +226,3 @@ class PeriodicCalc:
     def _calc_backtest(trades:pd.DataFrame, data:pd.DataFrame, initial_capital:float) -> Backtest:
         """Create Backtest object"""
         return Backtest(trades=trades, candles=data, initial_capital=initial_capital)
-            
-        
@@ -12,11 +12,11 @@ from flask import make_response
 
 class Plot:
 
-    def __init__(self, strategy, indicators: list = []):
+    def __init__(self, strategy, indicators: list = [], executor=None):
         self.strategy = strategy
         self.trades = self.strategy.list_of_trades()
         self.indicators = indicators
-        monthly_backtest = self.strategy.periodic_calc("1M")
+        monthly_backtest = self.strategy.periodic_calc("1M", executor=executor)
         self.monthly_backtest = pd.DataFrame(monthly_backtest.values(),
                             index=monthly_backtest.keys())
         self.monthly_backtest.reset_index(inplace=True)
@@ -221,23 +221,15 @@ class Plot:
             data = self.data.loc[pd.Timestamp(range_date[0], unit="ms"):pd.
                                  Timestamp(range_date[1], unit="ms")]
 
-        trades = pd.DataFrame(self.strategy.closed_positions +
-                              self.strategy.open_positions)
+        trades = self.strategy.trades_view(
+            trades_type,
+            trades_profitability if trades_profitability != "all" else None)
         # Filter the trades according the data in the slider
-        trades = trades[trades.entry_date.isin(data.date)]
+        trades = trades[trades.entry_date.isin(data.index)]
         if not trades.empty:
-            if trades_type != "all":
-                trades = trades[trades["type"] == trades_type]
-            if trades_profitability != "all":
-                if trades_profitability == "winning":
-                    trades = trades[trades["profit"] > 0]
-                elif trades_profitability == "losing":
-                    trades = trades[trades["profit"] < 0]
             if "log" in logarithmic:
                 trades["entry_price"] = np.log10(trades["entry_price"])
                 trades["exit_price"] = np.log10(trades["exit_price"])
-            trades.entry_date = pd.to_datetime(trades.entry_date, unit="ms")
-            trades.exit_date = pd.to_datetime(trades.exit_date, unit="ms")
             longs = trades[trades["type"] == "long"]
             shorts = trades[trades["type"] == "short"]
 
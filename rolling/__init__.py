@@ -0,0 +1 @@
+from .rolling_metrics import RollingMetrics
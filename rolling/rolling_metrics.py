@@ -0,0 +1,130 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class RollingMetrics:
+    """ Class to calculate backtest metrics on a rolling window
+
+    Description:
+        The window is time-based (e.g. '30D') or trade/candle-count based (int),
+        the first position of each window is found with one vectorized searchsorted.
+        The additive metrics (profit, gross profit/loss, number of trades, ...) are
+        the difference of prefix sums at both ends of the window and the extrema
+        (largest trades, draw down, peak equity) are sliding-window extrema with
+        monotonic deques, so all windows are computed in a single pass
+        instead of one backtest per window.
+
+    Attributes:
+        window (str or int): Time window (pandas offset, e.g. '30D') or number of trades/candles
+        initial_capital (float): Initial capital of strategy (for the percentages)
+    """
+    def __init__(self, window:str or int, initial_capital:float):
+        self.window = self._validate_window(window)
+        self.initial_capital = initial_capital
+
+    @staticmethod
+    def _validate_window(window):
+        if isinstance(window, (int, np.integer)):
+            if window < 1:
+                raise ValueError("The window must be a positive number of trades.")
+            return int(window)
+        return pd.Timedelta(window)
+
+    def _left(self, dates:np.ndarray) -> np.ndarray:
+        """ First position of the window ending at each position """
+        positions = np.arange(len(dates))
+        if isinstance(self.window, int):
+            return np.maximum(positions - self.window + 1, 0)
+        dates = dates.astype("datetime64[ns]")
+        return np.searchsorted(dates, dates - self.window.to_timedelta64(), side="right")
+
+    @staticmethod
+    def _window_sum(values:np.ndarray, left:np.ndarray) -> np.ndarray:
+        """ Sum of the window ending at each position with prefix sums """
+        prefix = np.r_[0.0, np.cumsum(values)]
+        return prefix[1:] - prefix[left]
+
+    @staticmethod
+    def _window_extreme(values:np.ndarray, left:np.ndarray, maximum:bool=True) -> np.ndarray:
+        """ Max (or min) of the window ending at each position with a monotonic deque """
+        result = np.empty(len(values))
+        candidates = deque()
+        for position, value in enumerate(values):
+            while candidates and (values[candidates[-1]] <= value if maximum else values[candidates[-1]] >= value):
+                candidates.pop()
+            candidates.append(position)
+            while candidates[0] < left[position]:
+                candidates.popleft()
+            result[position] = values[candidates[0]]
+        return result
+
+    def trades(self, trades:pd.DataFrame) -> pd.DataFrame:
+        """ Calculate the rolling metrics of the closed trades
+
+        Args:
+            trades (pd.DataFrame): Dataframe with trades (exit_date, profit, contract, draw_down)
+
+        Returns:
+            pd.DataFrame: The metrics of the window ending at each closed trade, indexed by exit date.
+        """
+        trades = trades[~pd.isna(trades.exit_date)]
+        if trades.empty:
+            return pd.DataFrame()
+        exit_date = trades.exit_date
+        if not np.issubdtype(exit_date.dtype, np.datetime64):
+            exit_date = pd.to_datetime(exit_date, unit="ms").round("1s")
+        order = np.argsort(exit_date.to_numpy(), kind="stable")
+        dates = exit_date.to_numpy()[order]
+        net = (trades.profit.to_numpy(dtype=float) * trades.contract.to_numpy(dtype=float))[order]
+        draw_down = trades.draw_down.to_numpy(dtype=float)[order]
+        left = self._left(dates)
+
+        net_profit = self._window_sum(net, left)
+        gross_profit = self._window_sum(np.where(net > 0, net, 0), left)
+        gross_loss = self._window_sum(np.where(net <= 0, net, 0), left)
+        total = self._window_sum(np.ones(len(net)), left)
+        wining = self._window_sum((net > 0).astype(float), left)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = {
+                'net_profit': net_profit,
+                'net_profit_percent': net_profit * 100 / self.initial_capital,
+                'gross_profit': gross_profit,
+                'gross_loss': gross_loss,
+                'profit_factor': np.where(gross_loss != 0, gross_profit / np.abs(gross_loss), gross_profit),
+                'total_closed_trades': total.astype(np.int64),
+                'number_wining_trades': wining.astype(np.int64),
+                'percent_profitable': wining * 100 / total,
+                'avg_trade': net_profit / total,
+                'largest_wining_trade': self._window_extreme(net, left, maximum=True),
+                'largest_lossing_trade': self._window_extreme(net, left, maximum=False),
+                'max_draw_down': self._window_extreme(draw_down, left, maximum=False),
+            }
+        return pd.DataFrame(result, index=pd.DatetimeIndex(dates, name="exit_date"))
+
+    def equity(self, equity:pd.Series) -> pd.DataFrame:
+        """ Calculate the rolling metrics of the equity curve
+
+        Args:
+            equity (pd.Series): Equity indexed by date (e.g. EquityCurve.series())
+
+        Returns:
+            pd.DataFrame: return_percent, volatility_percent (of the returns of the candles)
+                and draw_down_percent (from the highest equity of the window), indexed by date.
+        """
+        values = equity.to_numpy(dtype=float)
+        left = self._left(equity.index.to_numpy())
+        returns = np.r_[0.0, values[1:] / values[:-1] - 1]
+        # The first return of a window is the return into it, so it starts one position later
+        left_returns = np.minimum(left + 1, np.arange(len(values)))
+        count = np.arange(len(values)) - left_returns + 1
+        mean = self._window_sum(returns, left_returns) / count
+        square = self._window_sum(returns ** 2, left_returns) / count
+        peak = self._window_extreme(values, left, maximum=True)
+        result = {
+            'return_percent': (values / values[left] - 1) * 100,
+            'volatility_percent': np.sqrt(np.maximum(square - mean ** 2, 0)) * 100,
+            'draw_down_percent': (values / peak - 1) * 100,
+        }
+        return pd.DataFrame(result, index=equity.index)
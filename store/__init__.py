@@ -0,0 +1,4 @@
+from .column_store import ColumnStore
+from .shared_frame import SharedFrame
+from .candle_store import CandleStore
+from .kline_archive import KlineArchive
@@ -0,0 +1,335 @@
+import json
+import os
+import re
+import shutil
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+from .column_store import ColumnStore
+
+
+class CandleStore:
+    """ CandleStore class.
+
+    Description:
+        Store candles on disk partitioned by symbol, interval and month:
+            {root}/{symbol}/{interval}/{YYYY-MM}/
+        Each month is a ColumnStore (one `.npy` per column), so reading is a memory map
+        and appending new candles rewrites only the months that changed.
+        The ranges of time that have been synced are kept in `{root}/{symbol}/{interval}/sync.json`,
+        so the candles that the exchange does not have (before the listing or during a
+        maintenance) are not requested again.
+        Several processes can share a store: the writes of a symbol and interval hold a file lock
+        ({root}/{symbol}/{interval}/.lock), and a month (the snapshot, a derived interval) is written
+        into a temporary directory that replaces it, so a reader never sees a half-written month.
+
+    Attributes:
+        root: str
+            The directory of the store.
+    """
+    month_pattern = re.compile(r"[0-9]{4}-[0-9]{2}")
+    sync_file = "sync.json"
+    snapshot_dir = "snapshot"
+    derived_dir = "derived"
+    lock_file = ".lock"
+
+    def __init__(self, root: str = "./cache/candles"):
+        self.root = root
+
+    def _path(self, symbol: str, interval: str, month: str = None) -> str:
+        path = os.path.join(self.root, symbol, interval)
+        return os.path.join(path, month) if month else path
+
+    @contextmanager
+    def _locked(self, symbol: str, interval: str, shared: bool = False):
+        """Hold the lock of the symbol and interval (between the processes and the threads).
+
+        The readers share the lock (on Windows the lock is always exclusive).
+        """
+        path = self._path(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, self.lock_file), "a+") as file:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+                else:
+                    file.seek(0)
+                    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def _replace(path: str, data: pd.DataFrame) -> None:
+        """Write a ColumnStore into a temporary directory and move it to the path."""
+        parent, name = os.path.split(path)
+        tmp_path = os.path.join(parent, f".{name}.{os.getpid()}")
+        old_path = os.path.join(parent, f".{name}.{os.getpid()}.old")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        ColumnStore.write(tmp_path, data)
+        if os.path.exists(path):
+            # A directory can't replace a directory that is not empty
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        # The files that are still memory-mapped are freed when they are unmapped
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def months(self, symbol: str, interval: str) -> list:
+        """Return the sorted months (YYYY-MM) stored for the symbol and interval."""
+        path = self._path(symbol, interval)
+        if not os.path.isdir(path):
+            return []
+        return sorted(
+            month for month in os.listdir(path)
+            if self.month_pattern.fullmatch(month)
+            and ColumnStore.exists(os.path.join(path, month)))
+
+    @staticmethod
+    def _month(dates: np.ndarray) -> np.ndarray:
+        """Return the month (YYYY-MM) of the dates in milliseconds."""
+        dates = np.asarray(dates).astype(np.int64).astype("datetime64[ms]")
+        return dates.astype("datetime64[M]").astype(str)
+
+    def read(self, symbol: str, interval: str, mmap: bool = True,
+             columns: list = None, start: float = None, end: float = None) -> pd.DataFrame:
+        """
+        Read the candles of the symbol and interval.
+
+        Description:
+            With start/end, only the months that overlap the range are opened and
+            the rows of the first and the last month are found by a binary search on the dates,
+            so the time and the memory depend on the range and not on the whole history.
+
+        Parameters
+        ----------
+        symbol: str
+            The symbol (e.g. BTCUSDT).
+        interval: str
+            The interval (e.g. 1m).
+        mmap: bool
+            If True, the months are memory-mapped before they are concatenated.
+        columns: list
+            The columns that you want to read (default all of them).
+        start: float
+            The first date in milliseconds (default the first candle).
+        end: float
+            The last date in milliseconds (default the last candle).
+
+        Returns
+        -------
+        DataFrame
+            The candles sorted by date (empty if nothing is stored).
+        """
+        if not os.path.isdir(self._path(symbol, interval)):
+            return pd.DataFrame(columns=columns)
+        # A month is not replaced while its metadata and its columns are opened
+        with self._locked(symbol, interval, shared=True):
+            return self._read(symbol, interval, mmap, columns, start, end)
+
+    def _read(self, symbol: str, interval: str, mmap: bool = True,
+              columns: list = None, start: float = None, end: float = None) -> pd.DataFrame:
+        months = self.months(symbol, interval)
+        if start is not None:
+            months = [month for month in months if month >= self._month([start])[0]]
+        if end is not None:
+            months = [month for month in months if month <= self._month([end])[0]]
+        frames = []
+        for month in months:
+            path = self._path(symbol, interval, month)
+            rows = None if start is None and end is None else ColumnStore.bounds(path, start, end)
+            frames.append(ColumnStore.read(path, mmap=mmap, columns=columns, rows=rows))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def snapshot(self, symbol: str, interval: str) -> str:
+        """
+        Consolidate the months into one ColumnStore and return its directory.
+
+        Description:
+            Concatenating the months copies them, the snapshot is one file per column
+            for the whole history, so `ColumnStore.read(path, mmap=True)` returns views
+            of the files and all the processes that read it share the page cache.
+            The snapshot is rebuilt only when a month has been written after it.
+
+        Parameters
+        ----------
+        symbol: str
+            The symbol (e.g. BTCUSDT).
+        interval: str
+            The interval (e.g. 1m).
+
+        Returns
+        -------
+        str
+            The directory of the snapshot (None if nothing is stored).
+        """
+        if not self.months(symbol, interval):
+            return None
+        path = self._path(symbol, interval, self.snapshot_dir)
+        metadata = os.path.join(path, ColumnStore.metadata_file)
+        with self._locked(symbol, interval):
+            months = self.months(symbol, interval)
+            changed = max(
+                os.path.getmtime(os.path.join(self._path(symbol, interval, month), ColumnStore.metadata_file))
+                for month in months)
+            if not os.path.exists(metadata) or os.path.getmtime(metadata) < changed:
+                self._replace(path, self._read(symbol, interval))
+        return path
+
+    def derived(self, symbol: str, interval: str, base: str = "1m") -> str:
+        """
+        Resample the base candles to the interval and return the directory of the result.
+
+        Description:
+            The result is cached in {root}/{symbol}/{base}/derived/{interval} (a ColumnStore)
+            and resampled again only when the snapshot of the base candles has changed.
+            The last candle is dropped while it is not closed.
+
+        Parameters
+        ----------
+        symbol: str
+            The symbol (e.g. BTCUSDT).
+        interval: str
+            The interval (e.g. 4h, 7m, 2d).
+        base: str
+            The interval of the stored candles that are resampled.
+
+        Returns
+        -------
+        str
+            The directory of the resampled candles (None if nothing is stored).
+        """
+        snapshot = self.snapshot(symbol, base)
+        if snapshot is None:
+            return None
+        path = os.path.join(self._path(symbol, base, self.derived_dir), interval)
+        metadata = os.path.join(path, ColumnStore.metadata_file)
+        with self._locked(symbol, base):
+            changed = os.path.getmtime(os.path.join(snapshot, ColumnStore.metadata_file))
+            if not os.path.exists(metadata) or os.path.getmtime(metadata) < changed:
+                # Resampler is imported here, the handler package imports the store
+                from strategy_tester.handler.resampler import Resampler
+                candles = ColumnStore.read(snapshot, mmap=True)
+                # The last candle is not cached before all of its 1m candles are stored
+                data = Resampler.closed(Resampler.resample(candles, interval), candles)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._replace(path, data.reset_index(drop=True))
+        return path
+
+    def write(self, symbol: str, interval: str, data: pd.DataFrame,
+              synced: tuple = None) -> None:
+        """
+        Append candles to the store.
+
+        Description:
+            The candles are merged with the stored candles of their months
+            (a candle with the same date replaces the stored one).
+            The months and the synced ranges are updated under the lock of the symbol and interval.
+
+        Parameters
+        ----------
+        symbol: str
+            The symbol (e.g. BTCUSDT).
+        interval: str
+            The interval (e.g. 1m).
+        data: DataFrame
+            The candles with the columns ['date', 'open', 'high', 'low', 'close', 'volume', 'close_time', ...].
+        synced: tuple
+            The range of time (start, end) in milliseconds that the candles cover completely,
+            default the range from the first date to the last close_time.
+        """
+        with self._locked(symbol, interval):
+            if not data.empty:
+                data = data.sort_values("date", kind="stable")
+                months = self._month(data["date"].to_numpy())
+                starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+                ends = np.r_[starts[1:], len(months)]
+                for start, end in zip(starts, ends):
+                    self._write_month(symbol, interval, months[start], data.iloc[start:end])
+                if synced is None:
+                    synced = (float(data["date"].iat[0]), float(data["close_time"].iat[-1]))
+            if synced is not None:
+                self._add_synced(symbol, interval, synced)
+
+    def _write_month(self, symbol: str, interval: str, month: str, data: pd.DataFrame) -> None:
+        path = self._path(symbol, interval, month)
+        if ColumnStore.exists(path):
+            stored = ColumnStore.read(path, mmap=False)
+            data = pd.concat([stored, data], ignore_index=True)
+            data = data.drop_duplicates("date", keep="last").sort_values("date", kind="stable")
+        self._replace(path, data.reset_index(drop=True))
+
+    def synced(self, symbol: str, interval: str) -> list:
+        """Return the sorted ranges [start, end] (milliseconds) that have been synced."""
+        path = os.path.join(self._path(symbol, interval), self.sync_file)
+        if os.path.exists(path):
+            with open(path) as file:
+                return json.load(file)
+        # Stored without sync (e.g. an older store), the candles cover their own range
+        months = self.months(symbol, interval)
+        if not months:
+            return []
+        first = ColumnStore.read(self._path(symbol, interval, months[0]), columns=["date"])
+        last = ColumnStore.read(self._path(symbol, interval, months[-1]), columns=["close_time"])
+        return [[float(first["date"].iat[0]), float(last["close_time"].iat[-1])]]
+
+    def _add_synced(self, symbol: str, interval: str, synced: tuple) -> None:
+        """Merge the range with the synced ranges (adjacent ranges are joined, the caller holds the lock)."""
+        ranges = sorted(self.synced(symbol, interval) + [[float(synced[0]), float(synced[1])]])
+        merged = [ranges[0]]
+        for start, end in ranges[1:]:
+            if start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        path = self._path(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        tmp_path = os.path.join(path, f".{self.sync_file}.{os.getpid()}")
+        with open(tmp_path, "w") as file:
+            json.dump(merged, file)
+        os.replace(tmp_path, os.path.join(path, self.sync_file))
+
+    def missing(self, symbol: str, interval: str, start: int, end: int) -> list:
+        """
+        Return the ranges of time that have not been synced.
+
+        Parameters
+        ----------
+        symbol: str
+            The symbol (e.g. BTCUSDT).
+        interval: str
+            The interval (e.g. 1m).
+        start: int
+            The start of the range in milliseconds.
+        end: int
+            The end of the range in milliseconds.
+
+        Returns
+        -------
+        list
+            The missing ranges [(start, end), ...] in milliseconds (the head, the gaps and the tail).
+        """
+        missing = []
+        for synced_start, synced_end in self.synced(symbol, interval):
+            if synced_end < start or synced_start > end:
+                continue
+            if synced_start > start:
+                missing.append((int(start), int(synced_start) - 1))
+            start = max(start, synced_end + 1)
+        if start <= end:
+            missing.append((int(start), int(end)))
+        return missing
@@ -0,0 +1,187 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnStore:
+    """ ColumnStore class.
+
+    Description:
+        Store a pandas Series or DataFrame in a directory as one raw `.npy` file
+        per column (and one for the index) with a small json metadata sidecar.
+        The columns are opened with `np.memmap` (`np.load(mmap_mode='r')`),
+        so loading is effectively free and several processes reading the same
+        files share the page cache instead of holding their own copies.
+
+    Note:
+        The memory-mapped columns are read-only, copy them before any in-place change.
+        Object columns (e.g. strings) can't be memory-mapped, they are pickled and loaded into memory.
+    """
+    metadata_file = "metadata.json"
+    # Before pandas 3 concat copies the (memory-mapped) columns unless copy=False,
+    # since pandas 3 it doesn't copy them (Copy-on-Write) and the keyword is deprecated
+    _concat_options = {} if int(pd.__version__.split(".")[0]) >= 3 else {"copy": False}
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """The metadata is written last, so it marks a complete store."""
+        return os.path.exists(os.path.join(path, cls.metadata_file))
+
+    @staticmethod
+    def _save(path: str, name: str, values: np.ndarray) -> str:
+        """Save an array atomically (write a temporary file and rename it)."""
+        file_name = f"{name}.npy"
+        tmp_path = os.path.join(path, f".{name}.{os.getpid()}.npy")
+        np.save(tmp_path, values, allow_pickle=values.dtype == object)
+        os.replace(tmp_path, os.path.join(path, file_name))
+        return file_name
+
+    @staticmethod
+    def _load(path: str, file_name: str, mmap: bool) -> np.ndarray:
+        file_path = os.path.join(path, file_name)
+        try:
+            return np.load(file_path, mmap_mode="r" if mmap else None)
+        except ValueError:
+            # Object arrays can't be memory-mapped
+            return np.load(file_path, allow_pickle=True)
+
+    @classmethod
+    def write(cls, path: str, obj: pd.Series or pd.DataFrame) -> None:
+        """
+        Write a Series or DataFrame to the store.
+
+        Parameters
+        ----------
+        path: str
+            The directory of the store.
+        obj: pd.Series or pd.DataFrame
+            The object that you want to store.
+        """
+        if not isinstance(obj, (pd.Series, pd.DataFrame)):
+            raise TypeError("The object must be a pandas Series or DataFrame.")
+        os.makedirs(path, exist_ok=True)
+        frame = obj.to_frame() if isinstance(obj, pd.Series) else obj
+        metadata = {
+            "kind": "series" if isinstance(obj, pd.Series) else "frame",
+            "name": obj.name if isinstance(obj, pd.Series) else None,
+            "length": len(frame),
+            "columns": [],
+        }
+        index = frame.index
+        if isinstance(index, pd.RangeIndex):
+            metadata["index"] = {
+                "range": [index.start, index.stop, index.step],
+                "name": index.name,
+            }
+        else:
+            metadata["index"] = {
+                "file": cls._save(path, "index", index.to_numpy()),
+                "name": index.name,
+            }
+        for position, column in enumerate(frame.columns):
+            metadata["columns"].append({
+                "name": column,
+                "file": cls._save(path, f"column_{position}",
+                                  frame[column].to_numpy()),
+            })
+        tmp_path = os.path.join(path, f".{cls.metadata_file}.{os.getpid()}")
+        with open(tmp_path, "w") as file:
+            json.dump(metadata, file, default=str)
+        os.replace(tmp_path, os.path.join(path, cls.metadata_file))
+
+    @classmethod
+    def metadata(cls, path: str) -> dict:
+        with open(os.path.join(path, cls.metadata_file)) as file:
+            return json.load(file)
+
+    @classmethod
+    def bounds(cls, path: str, start: float = None, end: float = None,
+               column: str = "date") -> slice:
+        """
+        Find the rows whose sorted column is in [start, end].
+
+        Description:
+            A binary search on the memory-mapped column, so only the pages
+            that the search touches are read.
+
+        Parameters
+        ----------
+        path: str
+            The directory of the store.
+        start: float
+            The first value (default the first row).
+        end: float
+            The last value (default the last row).
+        column: str
+            The sorted column.
+
+        Returns
+        -------
+        slice
+            The positions of the rows.
+        """
+        metadata = cls.metadata(path)
+        file_name = next(item["file"] for item in metadata["columns"] if item["name"] == column)
+        values = cls._load(path, file_name, mmap=True)
+        first = 0 if start is None else int(np.searchsorted(values, start, side="left"))
+        last = len(values) if end is None else int(np.searchsorted(values, end, side="right"))
+        return slice(first, max(first, last))
+
+    @staticmethod
+    def _rows(values: np.ndarray, rows: slice, mmap: bool) -> np.ndarray:
+        """Slice the rows (a view of the memory map, or a copy of only the rows when it is not mapped)."""
+        if rows is None:
+            return values
+        values = values[rows]
+        return np.array(values) if not mmap and isinstance(values, np.memmap) else values
+
+    @classmethod
+    def read(cls, path: str, mmap: bool = True,
+             columns: list = None, rows: slice = None) -> pd.Series or pd.DataFrame:
+        """
+        Read a Series or DataFrame from the store.
+
+        Parameters
+        ----------
+        path: str
+            The directory of the store.
+        mmap: bool
+            If True, the columns are memory-mapped (zero-copy) instead of loaded.
+        columns: list
+            The columns that you want to read (default all of them).
+        rows: slice
+            The rows that you want to read (default all of them, see ColumnStore.bounds).
+            Only these rows are loaded when mmap is False.
+
+        Returns
+        -------
+        pd.Series or pd.DataFrame
+        """
+        metadata = cls.metadata(path)
+        index_meta = metadata["index"]
+        # The files are memory-mapped to read a part of them
+        load_mmap = mmap or rows is not None
+        if "range" in index_meta:
+            index = pd.RangeIndex(*index_meta["range"], name=index_meta["name"])
+            if rows is not None:
+                index = index[rows]
+        else:
+            index = pd.Index(cls._rows(cls._load(path, index_meta["file"], load_mmap), rows, mmap),
+                             name=index_meta["name"])
+        series = [
+            pd.Series(cls._rows(cls._load(path, column["file"], load_mmap), rows, mmap),
+                      index=index,
+                      name=column["name"],
+                      copy=False)
+            for column in metadata["columns"]
+            if columns is None or column["name"] in columns
+        ]
+        if metadata["kind"] == "series":
+            # Set the name in place, rename() would copy the memory-mapped values
+            series[0].name = metadata["name"]
+            return series[0]
+        if not series:
+            return pd.DataFrame(index=index)
+        return pd.concat(series, axis=1, **cls._concat_options)
@@ -0,0 +1,204 @@
+import io
+import os
+import re
+import warnings
+import zipfile
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from .candle_store import CandleStore
+
+
+def _ingest(root: str, symbol: str, interval: str, paths: list, chunk_size: int) -> dict:
+    """Ingest the archives of one symbol and interval (module level so it can be sent to a process pool)"""
+    return KlineArchive(chunk_size).ingest(CandleStore(root), paths, symbol, interval)
+
+
+class KlineArchive:
+    """ KlineArchive class.
+
+    Description:
+        Ingest the bulk kline archives of Binance (e.g. BTCUSDT-1m-2023-01.zip from data.binance.vision)
+        into the candle store. The csv inside the zip is streamed chunk by chunk
+        (`pd.read_csv(chunksize=...)` with the dtype of each column, so no object column is built),
+        The dates are checked first (only the date column is parsed): they must be sorted
+        across the chunks and the archives, and their gaps are reported.
+        Then the chunks are buffered by month and each month is written to the store once,
+        so the memory is bounded by a month and nothing is written if the dates are invalid.
+        Archives of different symbols/intervals are ingested by different processes.
+
+    Attributes:
+        chunk_size: int
+            The number of rows parsed at a time.
+    """
+    columns = ['date', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+               'qav', 'num_trades', 'taker_base_vol', 'taker_quote_vol', 'ignore']
+    dtypes = {'date': 'int64', 'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64',
+              'volume': 'float64', 'close_time': 'int64', 'qav': 'float64', 'num_trades': 'int64',
+              'taker_base_vol': 'float64', 'taker_quote_vol': 'float64', 'ignore': 'float64'}
+    # {symbol}-{interval}-{YYYY-MM} or {symbol}-{interval}-{YYYY-MM-DD}
+    name_pattern = re.compile(r"(?P<symbol>[A-Z0-9]+)-(?P<interval>[0-9]+[mhdw])-(?P<date>[0-9]{4}-[0-9]{2}(-[0-9]{2})?)\.zip")
+
+    def __init__(self, chunk_size: int = 1 << 17):
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def parse_name(cls, path: str) -> tuple:
+        """Return the symbol, the interval and the date of an archive from its name."""
+        match = cls.name_pattern.fullmatch(os.path.basename(path))
+        if match is None:
+            raise ValueError(f"The archive {path} is not named like SYMBOL-INTERVAL-DATE.zip.")
+        return match.group("symbol"), match.group("interval"), match.group("date")
+
+    def chunks(self, path: str, columns: list = None):
+        """
+        Stream the candles of an archive.
+
+        Parameters
+        ----------
+        path: str
+            The zip archive (with one csv).
+        columns: list
+            The columns that are parsed (default all of them).
+
+        Yields
+        ------
+        DataFrame
+            The candles of each chunk (dates in milliseconds like DataHandler).
+        """
+        with zipfile.ZipFile(path) as archive:
+            members = [name for name in archive.namelist() if name.endswith(".csv")]
+            if len(members) != 1:
+                raise ValueError(f"The archive {path} must have one csv file.")
+            with archive.open(members[0]) as raw:
+                stream = io.BufferedReader(raw)
+                # The newer archives have a header
+                header = stream.peek(1)[:1].isalpha()
+                for chunk in pd.read_csv(stream,
+                                         header=None,
+                                         skiprows=1 if header else 0,
+                                         names=self.columns,
+                                         usecols=columns,
+                                         dtype=self.dtypes,
+                                         chunksize=self.chunk_size):
+                    yield self._milliseconds(chunk)
+
+    @staticmethod
+    def _milliseconds(chunk: pd.DataFrame) -> pd.DataFrame:
+        """Convert the dates to milliseconds (the spot archives since 2025 are in microseconds)."""
+        for column in chunk.columns.intersection(["date", "close_time"]):
+            values = chunk[column].to_numpy()
+            if values.size and values[0] > 10**14:
+                values = values // 1000
+            chunk[column] = values.astype(np.float64)
+        return chunk
+
+    @staticmethod
+    def _gaps(dates: np.ndarray, previous: float, interval_ms: int) -> list:
+        """Return the gaps [(last date, next date), ...] of the dates (and the last date before them)."""
+        if previous is not None:
+            dates = np.r_[previous, dates]
+        deltas = np.diff(dates)
+        if (deltas <= 0).any():
+            raise ValueError("The dates of the archives are not sorted or have duplicates.")
+        positions = np.flatnonzero(deltas != interval_ms)
+        return [(float(dates[position]), float(dates[position + 1])) for position in positions]
+
+    def _months(self, paths: list):
+        """Stream the candles of the archives month by month (the chunks of a month are concatenated)."""
+        buffered = []
+        month = None
+        for path in paths:
+            for chunk in self.chunks(path):
+                if chunk.empty:
+                    continue
+                months = CandleStore._month(chunk["date"].to_numpy())
+                starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+                for start, end in zip(starts, np.r_[starts[1:], len(months)]):
+                    if months[start] != month and buffered:
+                        yield pd.concat(buffered, ignore_index=True)
+                        buffered = []
+                    month = months[start]
+                    buffered.append(chunk.iloc[start:end])
+        if buffered:
+            yield pd.concat(buffered, ignore_index=True)
+
+    def ingest(self, store: CandleStore, paths: list, symbol: str = None, interval: str = None) -> dict:
+        """
+        Ingest the archives of one symbol and interval into the store.
+
+        Parameters
+        ----------
+        store: CandleStore
+            The store that the candles are written to.
+        paths: list
+            The archives, they are ingested in the order of their dates.
+        symbol: str
+            The symbol (default from the names of the archives).
+        interval: str
+            The interval (default from the names of the archives).
+
+        Returns
+        -------
+        dict
+            The symbol, the interval, the number of rows and the gaps in the dates.
+        """
+        names = [self.parse_name(path) for path in paths]
+        symbol = symbol or names[0][0]
+        interval = interval or names[0][1]
+        if any(name[:2] != (symbol, interval) for name in names):
+            raise ValueError("The archives must have the same symbol and interval.")
+        # Resampler is imported here, the handler package imports the store
+        from strategy_tester.handler.resampler import Resampler
+        interval_ms = Resampler.interval_ms(interval)
+
+        paths = [path for _, path in sorted(zip(names, paths))]
+        # Check all the dates before writing, invalid archives don't leave months written and synced
+        rows = 0
+        gaps = []
+        previous = None
+        for path in paths:
+            for chunk in self.chunks(path, columns=["date"]):
+                if chunk.empty:
+                    continue
+                dates = chunk["date"].to_numpy()
+                gaps.extend(self._gaps(dates, previous, interval_ms))
+                previous = dates[-1]
+                rows += len(chunk)
+
+        for month in self._months(paths):
+            store.write(symbol, interval, month)
+        if gaps:
+            warnings.warn(f"{symbol} {interval}: {len(gaps)} gaps in the dates of the archives.")
+        return {"symbol": symbol, "interval": interval, "rows": rows, "gaps": gaps}
+
+    def ingest_many(self, store: CandleStore, paths: list, processes: int = None) -> list:
+        """
+        Ingest the archives of many symbols and intervals, one process per symbol/interval.
+
+        Parameters
+        ----------
+        store: CandleStore
+            The store that the candles are written to.
+        paths: list
+            The archives (named SYMBOL-INTERVAL-DATE.zip).
+        processes: int
+            The number of processes (default the number of cores, 1 for the current process).
+
+        Returns
+        -------
+        list
+            The result of ingest for each symbol and interval.
+        """
+        groups = {}
+        for path in paths:
+            symbol, interval, _ = self.parse_name(path)
+            groups.setdefault((symbol, interval), []).append(path)
+        tasks = [(store.root, symbol, interval, group, self.chunk_size)
+                 for (symbol, interval), group in groups.items()]
+        if processes == 1 or len(tasks) < 2:
+            return [_ingest(*task) for task in tasks]
+        with Pool(processes) as pool:
+            return pool.starmap(_ingest, tasks)
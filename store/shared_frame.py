@@ -0,0 +1,145 @@
+import inspect
+import os
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+class SharedFrame:
+    """ SharedFrame class.
+
+    Description:
+        Copy the columns (and the index) of a DataFrame once into one block of shared memory,
+        the handle (a small dict) is sent to the workers instead of the pickled frame
+        and each worker attaches the block and rebuilds the rows it needs on top of it (`to_frame`).
+        Object columns (e.g. strings) are stored as categorical codes, their categories are in the handle.
+
+    Note:
+        The process that created the block must close it (close/with) after the workers are done,
+        the workers attach it with `SharedFrame.attach(handle)` (a context manager that only closes it).
+        The workers don't track the blocks they attach (so their resource tracker doesn't free them),
+        the creator tracks its block until it is unlinked.
+    """
+    alignment = 8
+    # SharedMemory(track=False) is available since Python 3.13
+    _track_argument = "track" in inspect.signature(shared_memory.SharedMemory).parameters
+
+    def __init__(self, frame: pd.DataFrame):
+        if not isinstance(frame, pd.DataFrame):
+            raise TypeError("The frame must be a pandas DataFrame.")
+        arrays = {}
+        if not isinstance(frame.index, pd.RangeIndex):
+            arrays[None] = frame.index
+        for name in frame.columns:
+            arrays[name] = frame[name]
+
+        columns = []
+        offset = 0
+        for name, values in arrays.items():
+            categories = None
+            if values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype):
+                categorical = pd.Categorical(values)
+                categories = categorical.categories.to_list()
+                values = categorical.codes
+            values = np.ascontiguousarray(values)
+            columns.append((name, values.dtype.str, offset, categories))
+            arrays[name] = values
+            offset += -(-values.nbytes // self.alignment) * self.alignment
+
+        self._shared_memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, dtype, start, _ in columns:
+            self._view(self._shared_memory, dtype, start, len(frame))[:] = arrays[name]
+        self.handle = {
+            "name": self._shared_memory.name,
+            "length": len(frame),
+            "index_name": frame.index.name,
+            "columns": columns,
+        }
+        self._owner = True
+
+    @staticmethod
+    def _view(shared: shared_memory.SharedMemory, dtype, offset: int, length: int) -> np.ndarray:
+        return np.ndarray((length, ), dtype=np.dtype(dtype), buffer=shared.buf, offset=offset)
+
+    @classmethod
+    def _tracker(cls, command: str, shared: shared_memory.SharedMemory):
+        """Register/unregister a block in the resource tracker (Python < 3.13 tracks every block on posix)."""
+        if os.name == "posix" and not cls._track_argument:
+            getattr(resource_tracker, command)("/" + shared.name, "shared_memory")
+
+    @classmethod
+    def attach(cls, handle: dict) -> "SharedFrame":
+        """
+        Attach a block created in another process.
+
+        Parameters
+        ----------
+        handle: dict
+            The handle of the block (SharedFrame.handle).
+
+        Returns
+        -------
+        SharedFrame
+            The attached block (use .to_frame(rows) to get the rows).
+        """
+        shared = cls.__new__(cls)
+        # A tracked block would be freed by the resource tracker of the worker when the worker exits.
+        if cls._track_argument:
+            shared._shared_memory = shared_memory.SharedMemory(name=handle["name"], track=False)
+        else:
+            shared._shared_memory = shared_memory.SharedMemory(name=handle["name"])
+            cls._tracker("unregister", shared._shared_memory)
+        shared.handle = handle
+        shared._owner = False
+        return shared
+
+    def to_frame(self, rows=None) -> pd.DataFrame:
+        """
+        Rebuild the DataFrame (or some of its rows) on top of the block.
+
+        Parameters
+        ----------
+        rows: slice or np.ndarray
+            The positions of the rows (None for all the rows), the columns of a slice are views of the block.
+
+        Returns
+        -------
+        DataFrame
+            The rows of the frame.
+        """
+        rows = slice(None) if rows is None else rows
+        length = self.handle["length"]
+        index = pd.RangeIndex(length)[rows]
+        data = {}
+        for name, dtype, offset, categories in self.handle["columns"]:
+            values = self._view(self._shared_memory, dtype, offset, length)[rows]
+            if categories is not None:
+                values = pd.Categorical.from_codes(values, categories=categories)
+            if name is None:
+                index = pd.Index(values, name=self.handle["index_name"])
+            else:
+                data[name] = values
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def close(self):
+        """Close the block (and free it if it was created by this process)."""
+        if self._shared_memory is None:
+            return
+        try:
+            self._shared_memory.close()
+        except BufferError:
+            # A view of the block is still alive, the mapping is released with it.
+            pass
+        if self._owner:
+            # A forked worker shares the resource tracker of the creator and its `attach` unregistered
+            # the block, register it again so that `unlink` unregisters it once.
+            self._tracker("register", self._shared_memory)
+            self._shared_memory.unlink()
+        self._shared_memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,9 +1,12 @@
 from strategy_tester import StrategyTester
 from strategy_tester.backtest import Backtest
 from .indicator import IndicatorsParallel
+import numpy as np
 import pandas as pd
 from threading import Thread
+import mmap
 import os
+import sys
 from .sheet import Sheet
 from datetime import datetime
 import plotly.graph_objects as go
@@ -25,8 +28,9 @@ class Strategy(StrategyTester, IndicatorsParallel):
 
     @conditions.setter
     def conditions(strategy, *conditions):
-        parts = [strategy.data]
-        parts.extend(*conditions)
+        policy = strategy.dtype_policy
+        parts = [policy.cast_timestamps(strategy.data)]
+        parts.extend(policy.cast_condition(condition) for condition in conditions[0])
         strategy._conditions = pd.concat(parts, axis=1)
 
     @property
@@ -47,14 +51,18 @@ class Strategy(StrategyTester, IndicatorsParallel):
         """
         pass
 
-    def setdata(strategy, data: pd.DataFrame = None):
+    def setdata(strategy, data: pd.DataFrame = None, start=None, end=None):
         """ Set the data for the strategy tester.
         Parameters
         ----------
         data: DataFrame
             The data that you want to test the strategy with.
+        start: int or str
+            The first date (milliseconds or a date string like '2021-01-01').
+        end: int or str
+            The last date (milliseconds or a date string like '2021-03-31').
         """
-        strategy._set_data(data)
+        strategy._set_data(data, start, end)
 
     def set_parameters(strategy, **kwargs):
         """Set the initial parameters for the strategy.
@@ -253,7 +261,7 @@ class Strategy(StrategyTester, IndicatorsParallel):
 
     #     new_instance = conditions
     
-    def plot(self, *indicators):
+    def plot(self, *indicators, executor=None):
         """
         Plot the strategy.
         
@@ -261,8 +269,10 @@ class Strategy(StrategyTester, IndicatorsParallel):
         ----------
         indicators: list
             The list of the indicators that you want to plot.
+        executor: concurrent.futures.Executor
+            The executor that the monthly backtests are submitted to.
         """
-        Plot(self, indicators)
+        Plot(self, indicators, executor=executor)
 
     @staticmethod
     def _plot(candles: pd.DataFrame,
@@ -321,6 +331,83 @@ class Strategy(StrategyTester, IndicatorsParallel):
         fig = go.Figure(data=data, layout=layout)
         fig.show()
 
+    @staticmethod
+    def _memory_usage(obj, seen: set) -> tuple:
+        """Return (bytes in memory, memory-mapped bytes) of a Series or DataFrame, the buffers in seen are not counted again."""
+        if isinstance(obj, pd.Series):
+            arrays = [(obj, obj.to_numpy())]
+        elif isinstance(obj, pd.DataFrame):
+            arrays = [(obj[column], obj[column].to_numpy()) for column in obj.columns]
+        else:
+            return 0, 0
+        arrays.append((obj.index, obj.index.to_numpy()))
+        in_memory = mapped = 0
+        for source, values in arrays:
+            buffer = values.__array_interface__["data"][0] if values.dtype != object else id(values)
+            if buffer in seen:
+                continue
+            seen.add(buffer)
+            size = int(source.memory_usage(deep=True)) if isinstance(source, pd.Index) \
+                else int(source.memory_usage(index=False, deep=True))
+            # A memory-mapped array is a view of a mmap (a np.memmap made by astype is in memory)
+            base = values
+            while isinstance(base, np.ndarray):
+                base = base.base
+            if isinstance(base, mmap.mmap):
+                mapped += size
+            else:
+                in_memory += size
+        return in_memory, mapped
+
+    def memory_report(strategy) -> pd.DataFrame:
+        """
+        Return the bytes held by the data, the indicators, the conditions and the trades.
+
+        Description
+        -----------
+        The memory-mapped columns (e.g. the candles of CandleStore.snapshot or the memmap cache)
+        are in mapped_bytes: they are in the page cache that the processes share,
+        so only bytes is held by each worker of a sweep.
+        A buffer shared by two parts (e.g. the index of the data and its dates) is counted once.
+
+        Returns
+        -------
+        DataFrame
+            The rows data, indicators, conditions, trades and total,
+            with the columns bytes and mapped_bytes.
+        """
+        seen = set()
+        report = {}
+        report["data"] = strategy._memory_usage(getattr(strategy, "data", None), seen)
+        indicators = [0, 0]
+        for result in strategy.indicator_results().values():
+            usage = strategy._memory_usage(result, seen)
+            indicators = [indicators[0] + usage[0], indicators[1] + usage[1]]
+        report["indicators"] = tuple(indicators)
+        # The conditions are not set before the strategy is run
+        report["conditions"] = strategy._memory_usage(getattr(strategy, "conditions", None), seen)
+        trades = 0
+        closed_positions = getattr(strategy, "closed_positions", None)
+        if closed_positions is not None:
+            trades += closed_positions.nbytes if hasattr(closed_positions, "nbytes") \
+                else sum(sys.getsizeof(trade.__dict__) for trade in closed_positions)
+        trades += sum(sys.getsizeof(trade.__dict__) for trade in getattr(strategy, "open_positions", []))
+        cached_trades = strategy.cached_trades()
+        if cached_trades is not None:
+            # The raw trades are a view of the trade log
+            trades += strategy._memory_usage(cached_trades, seen)[0]
+        report["trades"] = (trades, 0)
+        report = pd.DataFrame.from_dict(report, orient="index", columns=["bytes", "mapped_bytes"])
+        report.loc["total"] = report.sum()
+        return report
+
+    def _date_range(strategy, start: float = None, end: float = None) -> pd.DataFrame:
+        """Return the candles between start and end (milliseconds), found by a binary search on the sorted dates."""
+        dates = strategy.data.date.to_numpy()
+        first = 0 if start is None else int(np.searchsorted(dates, start, side="left"))
+        last = len(dates) if end is None else int(np.searchsorted(dates, end, side="right"))
+        return strategy.data.iloc[first:last]
+
     def plot_candles(strategy,
                      start_date: str = None,
                      end_date: str = None) -> None:
@@ -347,14 +434,9 @@ class Strategy(StrategyTester, IndicatorsParallel):
         end_date = datetime.strptime(
             end_date, '%Y-%m-%d').timestamp() * 1000 if end_date else None
 
-        data = strategy.data
+        data = strategy._date_range(start_date, end_date).copy()
         data.index = pd.to_datetime(data.date, unit='ms')
 
-        if start_date:
-            data = data[(data.date >= start_date)]
-        if end_date:
-            data = data[(data.date <= end_date)]
-
         strategy._plot(data)
 
     def plot_trade(strategy,
@@ -491,26 +573,17 @@ class Strategy(StrategyTester, IndicatorsParallel):
             If True, only the winner trades will be plotted.
         """
         # Prepare the data
-        data = strategy.data.copy()
+        start_date = pd.Timestamp(start_date).value / 10**6 if start_date else None
+        end_date = pd.Timestamp(end_date).value / 10**6 if end_date else None
+        data = strategy._date_range(start_date, end_date).copy()
         data.index = pd.to_datetime(data.date, unit='ms')
-        if start_date:
-            data = data[(data.index >= start_date)]
-        if end_date:
-            data = data[(data.index <= end_date)]
 
         # Prepare the trades
-        trades = pd.DataFrame(strategy.closed_positions +
-                              strategy.open_positions)
         if just_loser and just_winner:
             raise ValueError("just_loser and just_winner cannot be True at the same time.")
-        if just_loser:
-            trades = trades[trades.profit <= 0]
-        elif just_winner:
-            trades = trades[trades.profit > 0]
-        trades.entry_date = pd.to_datetime(trades.entry_date, unit='ms')
-        trades.exit_date = pd.to_datetime(trades.exit_date, unit='ms')
-        trades_long = trades[trades.type == "long"]
-        trades_short = trades[trades.type == "short"]
+        profitability = "not_winning" if just_loser else "winning" if just_winner else None
+        trades_long = strategy.trades_view("long", profitability)
+        trades_short = strategy.trades_view("short", profitability)
 
         # Chart
         chart = go.Candlestick(x=data.index,
@@ -628,11 +701,23 @@ class Strategy(StrategyTester, IndicatorsParallel):
         fig.show()
         print(os.getcwd())
 
-    def result(strategy):
+    def result(strategy,
+               metrics: list = None,
+               profile: str = None,
+               risk: bool = False):
         """
         Description:
             Return the backtest with the specific parameters.
         
+        Parameters:
+            metrics: list
+                The names of the metrics that you want (default all of them).
+            profile: str
+                The name of a subset of metrics in Backtest.profiles (e.g. 'rank').
+            risk: bool
+                If True, the risk metrics of the equity curve (sharpe, sortino,
+                calmar, draw down duration, ...) are added to the result.
+        
         Returns:
             dict
                 The backtest result.
@@ -641,7 +726,10 @@ class Strategy(StrategyTester, IndicatorsParallel):
         if not isinstance(backtest, Backtest):
             return pd.Series(dict(strategy.parameters))
         else:
-            return pd.Series(backtest.result | dict(strategy.parameters))
+            result = backtest.result(metrics=metrics, profile=profile)
+            if risk:
+                result |= strategy.equity_curve().metrics()
+            return pd.Series(result | dict(strategy.parameters))
 
     def just_long(self):
         """
@@ -653,13 +741,12 @@ class Strategy(StrategyTester, IndicatorsParallel):
         self._restart_permission()
         if self.closed_positions:
             self.run()
-        trades = self.list_of_trades()
-        trades_long = trades[trades.type == "long"]
+        trades_long = self.trades_view("long")
         if trades_long.exit_date.dropna().empty:
             return None
         # Backtest
         backtest = Backtest(trades_long, self.data, self._initial_capital)
-        return pd.Series(backtest.result | dict(self.parameters))
+        return pd.Series(backtest.result() | dict(self.parameters))
 
     def just_trades_long(self):
         """
@@ -671,8 +758,7 @@ class Strategy(StrategyTester, IndicatorsParallel):
         self._restart_permission()
         if self.closed_positions:
             self.run()
-        trades = self.list_of_trades()
-        trades_long = trades[trades.type == "long"]
+        trades_long = self.trades_view("long")
         if trades_long.exit_date.dropna().empty:
             return None
         return trades_long
@@ -687,13 +773,12 @@ class Strategy(StrategyTester, IndicatorsParallel):
         self._restart_permission()
         if self.closed_positions:
             self.run()
-        trades = self.list_of_trades()
-        trades_short = trades[trades.type == "short"]
+        trades_short = self.trades_view("short")
         if trades_short.exit_date.dropna().empty:
             return None
         # Backtest
         backtest = Backtest(trades_short, self.data, self._initial_capital)
-        return pd.Series(backtest.result | dict(self.parameters))
+        return pd.Series(backtest.result() | dict(self.parameters))
 
     def just_trades_short(self):
         """
@@ -705,8 +790,7 @@ class Strategy(StrategyTester, IndicatorsParallel):
         self._restart_permission()
         if self.closed_positions:
             self.run()
-        trades = self.list_of_trades()
-        trades_short = trades[trades.type == "short"]
+        trades_short = self.trades_view("short")
         if trades_short.exit_date.dropna().empty:
             return None
         return trades_short
@@ -3,14 +3,19 @@ import re
 from datetime import datetime
 from threading import Thread
 
+import numpy as np
 import pandas as pd
 
 from strategy_tester.backtest import Backtest
 from strategy_tester.commands.calculator_trade import CalculatorTrade
 from strategy_tester.encoder import NpEncoder
+from strategy_tester.equity import EquityCurve
 from strategy_tester.handler.datahandler import DataHandler
 from strategy_tester.models.trade import Trade
+from strategy_tester.models.trade_log import TradeLog
+from strategy_tester.montecarlo import MonteCarlo
 from strategy_tester.periodic import PeriodicCalc
+from strategy_tester.rolling import RollingMetrics
 from strategy_tester.sheet import Sheet
 
 
@@ -38,8 +43,8 @@ class StrategyTester:
             The commission for the strategy.(default 0)
         open_positions: list
             When the strategy is tested, the open positions will be stored in this list.
-        closed_positions: list
-            When the strategy is tested, the closed positions will be stored in this list.
+        closed_positions: TradeLog
+            When the strategy is tested, the closed positions will be stored in this columnar log.
             
     Methods:
         setdata(data: DataFrame=None)
@@ -63,12 +68,15 @@ class StrategyTester:
         strategy.long = "long"
         strategy.short = "short"
 
-        strategy.interval = "5m"
+        # The bars of BarAggregator keep their interval (e.g. 'volume:1000')
+        strategy.interval = strategy.interval if strategy.__dict__.get("_bars", False) else "5m"
         # Amount of commission paid
         strategy.commission_paid = 0
         strategy.current_candle = None
         strategy.open_positions = []
-        strategy.closed_positions = []
+        strategy.closed_positions = TradeLog()
+        strategy._positions_version = 0
+        strategy._trades_cache = None
         strategy.links_results = {}
         strategy.threads_sheet = []
         strategy.cash_series = pd.Series(dtype=float)
@@ -140,7 +148,7 @@ class StrategyTester:
     def net_profit(strategy):
         if strategy.closed_positions:
             # Return sum of all profits
-            return sum([trade.profit for trade in strategy.closed_positions]) - strategy._initial_capital
+            return np.nansum(strategy.closed_positions.column("profit")) - strategy._initial_capital
         else:
             return 0
         
@@ -229,6 +237,7 @@ class StrategyTester:
                 comment=comment)
             print("entry contract:", trade.contract)
             strategy.open_positions.append(trade)
+            strategy._positions_changed()
 
     def exit(strategy,
              from_entry: str,
@@ -279,6 +288,7 @@ class StrategyTester:
                             trade.contract = (1-qty) * trade.contract
                         else:
                             strategy.open_positions.remove(trade)
+                        strategy._positions_changed()
                         strategy.cash_series = pd.concat([
                             strategy.cash_series,
                             pd.Series(data=strategy._cash,
@@ -306,23 +316,51 @@ class StrategyTester:
     def _prepare_time(self, time: int) -> int:
         """
         Prepare time to be used in the strategy.
+        
+        Description:
+            With time candles, the rounded close_time is the date of the next candle.
+            The bars of BarAggregator are irregular, so the date of the next bar is taken
+            (the close_time of the last bar if there is no next bar).
         """
+        if self.__dict__.get("_bars", False):
+            dates = self.data.date.to_numpy()
+            position = int(np.searchsorted(dates, time, side="right"))
+            return float(dates[position]) if position < len(dates) else float(time)
         return self._convert_time(self._round_time(time))
 
-    def _set_data(strategy, data: DataHandler = None):
+    def _set_data(strategy, data: DataHandler = None, start=None, end=None):
         """Convert the data to DataHandler object and set the data to the StrategyTester.
         
+        Description:
+            The data is not copied: the candle attributes (open, high, ...) are views of the columns.
+            With the directory of a ColumnStore (e.g. CandleStore.snapshot), the columns are
+            memory-mapped, so the workers of a sweep share the page cache instead of a copy each.
+        
         Parameters
         ----------
-        data: DataFrame
-            The data that you want to test the strategy with.
+        data: DataFrame or str
+            The data that you want to test the strategy with (or the directory of a ColumnStore).
+        start: int or str
+            The first date (milliseconds or a date string), only the candles from it are kept.
+        end: int or str
+            The last date (milliseconds or a date string).
         """
+        # The candles are cast (and the unused columns dropped) by the dtype policy of the strategy
+        policy = getattr(strategy, "dtype_policy", None)
         if data is None:
-            data = DataHandler(interval=strategy.interval, months=1).data
+            if start is None:
+                handler = DataHandler(interval=strategy.interval, months=1, end=end, dtype_policy=policy)
+            else:
+                handler = DataHandler(interval=strategy.interval, start=start, end=end, dtype_policy=policy)
         else:
-            data = DataHandler(data=data).data
+            handler = DataHandler(data=data, start=start, end=end, dtype_policy=policy)
+        data = handler.data
+        strategy._bars = handler.bars
+        if handler.bars:
+            # The bars of BarAggregator have no time interval (e.g. 'volume:1000')
+            strategy.interval = handler.interval
         # data = data.reset_index(drop=True)
-        data.index = data.date
+        data.index = pd.Index(data.date.to_numpy(), name="date", copy=False)
         strategy.data = data
         strategy.open = data.open
         strategy.high = data.high
@@ -445,21 +483,132 @@ class StrategyTester:
                     "The quantity of the trade must be less than the cash.")
         return qty
 
+    def _positions_changed(strategy):
+        """Invalidate the cached trades frame (called whenever a position is opened or closed)."""
+        strategy._positions_version = getattr(strategy, "_positions_version", 0) + 1
+
+    def _trades_cached(strategy) -> dict:
+        """Get the cache of the trades frame
+        
+        Description:
+            The cache is keyed on the version of the positions and the number of the open and closed positions,
+            so it is rebuilt only after a position has been opened or closed.
+            The entries are filled lazily by `_trades_frame`, `list_of_trades` and `_trades_positions`.
+        """
+        key = (getattr(strategy, "_positions_version", 0),
+               len(strategy.closed_positions),
+               len(strategy.open_positions))
+        cache = getattr(strategy, "_trades_cache", None)
+        if cache is None or cache["key"] != key:
+            cache = {"key": key, "raw": None, "trades": None, "positions": {}}
+            strategy._trades_cache = cache
+        return cache
+
+    def cached_trades(strategy) -> pd.DataFrame:
+        """Return the cached list of trades (None if it has not been built), it must not be modified."""
+        cache = strategy.__dict__.get("_trades_cache")
+        return None if cache is None else cache["trades"]
+
+    def _trades_frame(strategy) -> pd.DataFrame:
+        """Return the closed trades (a view of the trade log) and the open trades as a DataFrame (cached, dates in ms).
+        
+        Description:
+            The open trades are appended to a copy of the log, so the columns have
+            the dtypes of a DataFrame of all the Trades (e.g. NaN and not None for the exit price of an open trade).
+        """
+        cache = strategy._trades_cached()
+        if cache["raw"] is None:
+            trades = strategy.closed_positions
+            if strategy.open_positions:
+                trades = trades.copy()
+                for trade in strategy.open_positions:
+                    trades.append(trade)
+            cache["raw"] = trades.to_frame()
+        return cache["raw"]
+
+    @staticmethod
+    def _copy_frame(frame: pd.DataFrame) -> pd.DataFrame:
+        """Copy a cached frame for the caller (a lazy copy under Copy-on-Write, a deep copy otherwise)."""
+        copy_on_write = int(pd.__version__.split(".")[0]) >= 3 \
+            or getattr(pd.options.mode, "copy_on_write", False) is True
+        return frame.copy(deep=not copy_on_write)
+
     def list_of_trades(strategy) -> list:
         """List of trades.
         
+        Description:
+            The DataFrame is cached until a position is opened or closed,
+            so the dates are converted once. The caller gets a copy,
+            changing it does not change the cache.
+        
         Returns
         -------
         list
             The list of all the open trades and closed trades.
         """
-        trades = pd.DataFrame(strategy.closed_positions +
-                              strategy.open_positions)
-        trades.entry_date = pd.to_datetime(trades.entry_date,
-                                           unit="ms").round("1s")
-        trades.exit_date = pd.to_datetime(trades.exit_date,
-                                          unit="ms").round("1s")
-        return trades
+        return strategy._copy_frame(strategy._trades_list())
+
+    def _trades_list(strategy) -> pd.DataFrame:
+        """Return the cached list of trades (dates converted), it must not be modified."""
+        cache = strategy._trades_cached()
+        if cache["trades"] is None:
+            trades = strategy._trades_frame().copy()
+            trades.entry_date = pd.to_datetime(trades.entry_date,
+                                               unit="ms").round("1s")
+            trades.exit_date = pd.to_datetime(trades.exit_date,
+                                              unit="ms").round("1s")
+            cache["trades"] = trades
+        return cache["trades"]
+
+    _trades_filters = {
+        "long": lambda trades: (trades["type"] == "long").to_numpy(),
+        "short": lambda trades: (trades["type"] == "short").to_numpy(),
+        "winning": lambda trades: (trades["profit"] > 0).to_numpy(),
+        "losing": lambda trades: (trades["profit"] < 0).to_numpy(),
+        "not_winning": lambda trades: (trades["profit"] <= 0).to_numpy(),
+        "closed": lambda trades: trades["exit_date"].notna().to_numpy(),
+    }
+
+    def _trades_positions(strategy, kind: str) -> np.ndarray:
+        """Get the (cached) positions of the trades of a kind in the list of trades"""
+        if kind not in strategy._trades_filters:
+            raise ValueError(
+                f"The kind of the trades must be one of {list(strategy._trades_filters)}.")
+        positions = strategy._trades_cached()["positions"]
+        if kind not in positions:
+            positions[kind] = np.flatnonzero(
+                strategy._trades_filters[kind](strategy._trades_list()))
+        return positions[kind]
+
+    def trades_view(strategy, *kinds: str) -> pd.DataFrame:
+        """
+        Filter the list of trades.
+        
+        Description:
+            The positions of each kind are computed once (until a position is opened or closed)
+            and the trades are taken by position, so no boolean mask is rebuilt on each call.
+        
+        Parameters
+        ----------
+        kinds: str
+            'long', 'short', 'winning', 'losing', 'not_winning' (profit <= 0) or 'closed'
+            (the intersection of the kinds is returned).
+            
+        Returns
+        -------
+        DataFrame
+            The trades of the kinds (all the trades if no kind is given).
+        """
+        trades = strategy._trades_list()
+        kinds = [kind for kind in kinds if kind and kind != "all"]
+        if not kinds:
+            return strategy._copy_frame(trades)
+        positions = strategy._trades_positions(kinds[0])
+        for kind in kinds[1:]:
+            positions = np.intersect1d(positions,
+                                       strategy._trades_positions(kind),
+                                       assume_unique=True)
+        return trades.take(positions)
 
     @property
     def backtest(strategy) -> dict:
@@ -471,8 +620,7 @@ class StrategyTester:
         dict
             The backtest of the strategy.
         """
-        trades = pd.DataFrame(strategy.closed_positions +
-                              strategy.open_positions)
+        trades = strategy._trades_frame()
         if strategy.closed_positions:
             back_test = Backtest(trades, strategy.data,
                                  strategy._initial_capital)
@@ -480,6 +628,78 @@ class StrategyTester:
         else:
             return "There are no closed positions."
 
+    def equity_curve(strategy) -> EquityCurve:
+        """
+        Calculate the bar-by-bar equity curve of the strategy.
+        
+        Returns
+        -------
+        EquityCurve
+            The equity curve (use .series() for a pandas Series and .metrics() for the risk metrics).
+        """
+        trades = strategy._trades_frame()
+        return EquityCurve(trades, strategy.data, strategy._initial_capital)
+
+    def rolling_metrics(strategy,
+                        window: str or int = "30D",
+                        equity: bool = False) -> pd.DataFrame:
+        """
+        Calculate the backtest metrics on a rolling window.
+        
+        Parameters
+        ----------
+        window: str or int
+            The time window (e.g. '30D') or the number of trades (candles for the equity).
+        equity: bool
+            If True, the metrics of the equity curve are calculated instead of the closed trades.
+            
+        Returns
+        -------
+        DataFrame
+            The metrics of the window ending at each closed trade (or candle).
+        """
+        rolling = RollingMetrics(window, strategy._initial_capital)
+        if equity:
+            return rolling.equity(strategy.equity_curve().series())
+        return rolling.trades(strategy.closed_positions.to_frame())
+
+    def monte_carlo(strategy,
+                    simulations: int = 10000,
+                    method: str = "permutation",
+                    ruin: float = 50,
+                    seed: int = None,
+                    processes: int = None) -> MonteCarlo:
+        """
+        Resample the closed trades of the strategy (Monte Carlo simulation).
+        
+        Parameters
+        ----------
+        simulations: int
+            The number of simulations.
+        method: str
+            'permutation' (shuffle the order of the trades) or 'bootstrap' (resample with replacement).
+        ruin: float
+            The draw down of the initial capital (percent) that counts as ruin.
+        seed: int
+            The seed of the random generator.
+        processes: int
+            The number of processes of the pool (None to run in the current process).
+            
+        Returns
+        -------
+        MonteCarlo
+            The simulation (use .summary() for the quantiles and .ruin_probability).
+        """
+        backtest = strategy.backtest
+        if not isinstance(backtest, Backtest):
+            raise ValueError(backtest)
+        return MonteCarlo(backtest,
+                          simulations=simulations,
+                          method=method,
+                          ruin=ruin,
+                          seed=seed,
+                          processes=processes)
+
     @staticmethod
     def insert_sheet(strategy, sheet: Sheet, results_objs: dict):
         """
@@ -508,17 +728,64 @@ class StrategyTester:
                     sheet_id, worksheet_id, result["net_profit_percent"])
         sheet.worksheet.append_rows(results)
 
+    def periodic_submit(strategy,
+                        freq: str = None,
+                        start_date: str = None,
+                        end_date: str = None,
+                        executor=None) -> PeriodicCalc:
+        """
+        Submit the periodic backtests of the strategy without waiting for them.
+        
+        Description
+        -----------
+        The periods are submitted to the executor and the returned PeriodicCalc is the handle of the work,
+        so one executor can run the periods of many strategies at the same time:
+        
+            handles = [strategy.periodic_submit("1M", executor=executor) for strategy in strategies]
+            results = [handle.results for handle in handles]
+        
+        Reading `results` waits for the periods and frees the shared memory,
+        call `close()` (or use the handle as a context manager) to drop a handle without its results.
+        
+        Parameters
+        ----------
+        freq: str
+            The frequency of the periods (e.g. '1D', '1W', '1M', '1Y').
+        executor: concurrent.futures.Executor
+            The executor that the periods are submitted to (e.g. a ProcessPoolExecutor shared by many strategies).
+            
+        Returns
+        -------
+        PeriodicCalc
+            The handle of the periodic backtests (None if there are no closed trades).
+        """
+        if freq and not isinstance(freq, str):
+            raise ValueError("The days must be an string(e.g. '1D', '1W', '1M', '1Y').")
+
+        trades = strategy.closed_positions.to_frame()
+        if trades.empty:
+            return None
+        return PeriodicCalc(initial_capital=strategy._initial_capital,
+                            trades=trades,
+                            data=strategy.data,
+                            freq=freq,
+                            start_date=start_date,
+                            end_date=end_date,
+                            executor=executor)
+
     def periodic_calc(strategy,
                       freq: str = None,
                       start_date: str = None,
                       end_date: str = None,
-                      sheet: Sheet = None) -> dict:
+                      sheet: Sheet = None,
+                      executor=None) -> dict:
         """
         Calculate the periodic returns of the strategy.
         
         Description
         -----------
         After the strategy is tested, if you want to calculate the periodic returns of the strategy, you can use this function.
+        It waits for the results, use `periodic_submit` to run the periods of many strategies on one executor.
         
         Parameters
         ----------
@@ -526,26 +793,23 @@ class StrategyTester:
             The number of days that you want to calculate the periodic returns for.(default: 30 days)
         sheet: gspread.Spreadsheet
             The sheet that you want to save the results to.
+        executor: concurrent.futures.Executor
+            The executor that the periods are submitted to (e.g. a ProcessPoolExecutor shared by many strategies).
             
         Returns
         -------
         results : dict
             The periodic returns of the strategy.       
         """
-        if freq and not isinstance(freq, str):
-            raise ValueError("The days must be an string(e.g. '1D', '1W', '1M', '1Y').")
-
-        trades = pd.DataFrame(strategy.closed_positions)
-        if trades.empty:
+        periodic_obj = strategy.periodic_submit(freq=freq,
+                                                start_date=start_date,
+                                                end_date=end_date,
+                                                executor=executor)
+        if periodic_obj is None:
             return None
-        periodic_obj = PeriodicCalc(initial_capital=strategy._initial_capital,
-                                    trades=trades,
-                                    data=strategy.data,
-                                    freq=freq,
-                                    start_date=start_date,
-                                    end_date=end_date)
-
-        results_objs = periodic_obj.results
+
+        with periodic_obj:
+            results_objs = periodic_obj.results
 
         if sheet:
             thread = Thread(target=strategy.insert_sheet,
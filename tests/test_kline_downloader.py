@@ -0,0 +1,98 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+requests = pytest.importorskip("requests")
+pytest.importorskip("binance")
+
+from strategy_tester.handler.kline_downloader import KlineDownloader
+
+MINUTE = 60000
+LISTING = 1_600_000_000_000
+
+
+class KlinesHandler(BaseHTTPRequestHandler):
+    """
+    Serve the 1m klines of the pages like the klines endpoint.
+
+    Each page also returns the kline before its start (a duplicate of the previous page),
+    and the first requests of the pages in `server.failures` answer their status.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        params = {key: int(values[0]) for key, values in parse_qs(urlparse(self.path).query).items()
+                  if key not in ("symbol", "interval")}
+        with self.server.lock:
+            self.server.requests.append(params["startTime"])
+            statuses = self.server.failures.get(params["startTime"], [])
+            status = statuses.pop(0) if statuses else 200
+        if status == 200:
+            start = max(params["startTime"] - MINUTE, LISTING)
+            klines = [[time, "1", "2", "0.5", "1.5", "10", time + MINUTE - 1, "1", 3, "1", "1", "0"]
+                      for time in range(start, params["endTime"] + 1, MINUTE)]
+            body = json.dumps(klines[:params["limit"] + 1]).encode()
+        else:
+            body = b'{"code": -1003, "msg": "Too many requests."}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KlinesHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.failures = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/api/v3/klines"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_klines_are_sorted_without_duplicates(server):
+    downloader = KlineDownloader(url=server.url, max_workers=4, limit=10)
+    klines = downloader.klines("BTCUSDT", "1m", LISTING, LISTING + 95 * MINUTE - 1)
+    downloader.close()
+    assert [kline[0] for kline in klines] == [LISTING + minute * MINUTE for minute in range(95)]
+    assert sorted(server.requests) == [LISTING + page * 10 * MINUTE for page in range(10)]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_failed_pages_are_retried(server, status):
+    failed = LISTING + 30 * MINUTE
+    server.failures[failed] = [status]
+    downloader = KlineDownloader(url=server.url, max_workers=4, limit=10)
+    klines = downloader.klines("BTCUSDT", "1m", LISTING, LISTING + 50 * MINUTE - 1)
+    downloader.close()
+    assert [kline[0] for kline in klines] == [LISTING + minute * MINUTE for minute in range(50)]
+    assert server.requests.count(failed) == 2
+
+
+def test_retries_are_limited(server):
+    server.failures[LISTING] = [503, 503, 503]
+    downloader = KlineDownloader(url=server.url, max_workers=1, limit=10, retries=1)
+    with pytest.raises(requests.exceptions.RetryError):
+        downloader.klines("BTCUSDT", "1m", LISTING, LISTING + 5 * MINUTE - 1)
+    downloader.close()
+    assert server.requests == [LISTING, LISTING]
+
+
+def test_errors_are_not_retried(server):
+    server.failures[LISTING] = [400]
+    downloader = KlineDownloader(url=server.url, max_workers=1, limit=10)
+    with pytest.raises(requests.HTTPError):
+        downloader.klines("BTCUSDT", "1m", LISTING, LISTING + 5 * MINUTE - 1)
+    downloader.close()
+    assert server.requests == [LISTING]
@@ -0,0 +1,46 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("binance")
+
+from strategy_tester import StrategyTester
+from strategy_tester.models import Trade
+from strategy_tester.models.trade_log import TradeLog
+
+
+def closed_trades() -> list:
+    return [Trade(type="long", entry_date=60000. * row, entry_price=100., contract=1.,
+                  exit_date=60000. * row + 30000, exit_price=101., profit=1., profit_percent=1.,
+                  entry_signal="long", exit_signal="exit", bars_traded=3 + row)
+            for row in range(4)]
+
+
+def open_trade() -> Trade:
+    return Trade(type="short", entry_date=600000., entry_price=99., contract=2., entry_signal="short")
+
+
+def baseline_list_of_trades(trades: list) -> pd.DataFrame:
+    """list_of_trades before the trade log: a DataFrame of the Trades."""
+    frame = pd.DataFrame(trades)
+    frame.entry_date = pd.to_datetime(frame.entry_date, unit="ms").round("1s")
+    frame.exit_date = pd.to_datetime(frame.exit_date, unit="ms").round("1s")
+    return frame
+
+
+def test_to_frame_has_the_dtypes_of_the_trades():
+    trades = closed_trades()
+    pd.testing.assert_frame_equal(TradeLog(trades).to_frame(), pd.DataFrame(trades))
+
+
+def test_list_of_trades_with_an_open_position():
+    strategy = StrategyTester()
+    strategy.set_init()
+    for trade in closed_trades():
+        strategy.closed_positions.append(trade)
+    strategy.open_positions.append(open_trade())
+    strategy._positions_changed()
+
+    trades = strategy.list_of_trades()
+    expected = baseline_list_of_trades(closed_trades() + [open_trade()])
+    pd.testing.assert_series_equal(trades.dtypes, expected.dtypes)
+    pd.testing.assert_frame_equal(trades, expected)
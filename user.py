@@ -19,6 +19,7 @@ from binance.exceptions import BinanceAPIException
 from strategy_tester.binance_inheritance import (ThreadedWebsocketManager)
 from strategy_tester.commands import CalculatorTrade
 from strategy_tester.decorator import validate_float
+from strategy_tester.handler import ExchangeInfo, KlineDownloader
 from strategy_tester.models import Trade
 from strategy_tester.strategy import Strategy
 
@@ -26,6 +27,8 @@ from strategy_tester.strategy import Strategy
 class User(Client, Strategy):
 
     _user = True
+    # Recompute just the last two values of indicators with a lookback after each kline
+    _tail = 2
     _exit = False
     _entry = False
     _permission_long = True
@@ -55,6 +58,8 @@ class User(Client, Strategy):
                  **kwargs):
         super(Client, strategy).__init__(api_key, api_secret, requests_params,
                                          tld, testnet)
+        # Historical klines are downloaded page by page in parallel
+        strategy.kline_downloader = KlineDownloader(url=f"{strategy.API_URL}/v3/klines")
         strategy.primary_pair, strategy.secondary_pair = \
             strategy._validate_pair(primary_pair, secondary_pair)
         strategy.threaded_websocket_manager_spot = \
@@ -242,7 +247,7 @@ class User(Client, Strategy):
         if kline:  # Get remind kline data
             last_kline = kline.iloc[-1]
             remind_kline = pd.DataFrame(
-                strategy.get_historical_klines(
+                strategy.kline_downloader.klines(
                     strategy.symbol, strategy.interval,
                     last_kline["close_time"])).iloc[:, :7]
         else:  # Get 5000 kline data
@@ -251,10 +256,10 @@ class User(Client, Strategy):
             # Get <num> kline data ago
             num = 3000 * int(num)
             remind_kline = pd.DataFrame(
-                strategy.get_historical_klines(
+                strategy.kline_downloader.klines(
                     strategy.symbol,
                     strategy.interval,
-                    start_str=f"{num}{period} ago UTC")).iloc[:, :9]
+                    f"{num}{period} ago UTC")).iloc[:, :9]
 
         remind_kline.columns = [
             "date", "open", "high", "low", "close", "volume", "close_time",
@@ -938,19 +943,18 @@ class User(Client, Strategy):
         primary = primary.upper()
         secondary = secondary.upper()
         symbol = primary + secondary
-        list_of_symbols = strategy.futures_exchange_info()["symbols"]
+        # The exchange information is cached (memory and disk) for an hour
+        strategy.exchange_info = ExchangeInfo(
+            "futures", fetch=strategy.futures_exchange_info)
         try:
-            info = next(item for item in list_of_symbols
-                        if item["symbol"] == symbol)
-            strategy.symbol = symbol
-            strategy.minQty = float(
-                next(item for item in info["filters"]
-                     if item["filterType"] == "MARKET_LOT_SIZE")["minQty"])
-            return primary, secondary
-        except StopIteration:
+            strategy.filters = strategy.exchange_info.filters(symbol)
+        except ValueError:
             err = f"The pair {symbol} is not supported."\
                 f"({primary=}, {secondary=})"
             raise ValueError(err)
+        strategy.symbol = symbol
+        strategy.minQty = strategy.filters["market_min_qty"]
+        return primary, secondary
 
     @staticmethod
     def _plot(candles: pd.DataFrame,